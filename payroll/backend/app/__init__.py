@@ -4,8 +4,11 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from config import config
+from app.cache import analytics_cache, facet_cache, auth_cache, replica_cache
+from app import profiling, replica
+from app.log import configure_logging
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': replica.RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 
@@ -14,21 +17,33 @@ def create_app(config_name='development'):
     
     # Load configuration
     app.config.from_object(config[config_name])
+    configure_logging(app)
     
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    analytics_cache.init_app(app)
+    facet_cache.init_app(app)
+    auth_cache.init_app(app)
+    replica_cache.init_app(app)
+    replica.init_app(app)
+    profiling.init_app(app)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     
     # Register blueprints
-    from app.routes import auth_bp, employee_bp, payroll_bp, payslip_bp, analytics_bp
+    from app.routes import auth_bp, employee_bp, payroll_bp, payslip_bp, analytics_bp, jobs_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(employee_bp)
     app.register_blueprint(payroll_bp)
     app.register_blueprint(payslip_bp)
     app.register_blueprint(analytics_bp)
+    app.register_blueprint(jobs_bp)
+    
+    # CLI commands
+    from app.cli import register_commands
+    register_commands(app)
     
     # Error handlers
     @app.errorhandler(400)
@@ -0,0 +1,67 @@
+from functools import wraps
+from flask import current_app, g
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.cache import auth_cache
+from app.models import User, Employee
+from app.models.user import RoleMixin
+
+class AuthContext(RoleMixin):
+    """The authenticated caller: user id, email, role and linked employee id
+    
+    Carries the same role checks as User, so routes can authorize against
+    ``g.current_user`` without loading the full user row.
+    """
+    
+    def __init__(self, id, email, role, employee_id=None):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.employee_id = employee_id
+    
+    def __repr__(self):
+        return f'<AuthContext user={self.id} role={self.role} employee={self.employee_id}>'
+
+def load_auth_context(user_id):
+    """Resolve a user id to an AuthContext (None if the user no longer exists)
+    
+    The user and its linked employee come from one query and are cached for
+    AUTH_CONTEXT_TTL seconds; invalidate_auth_context() drops the entry when
+    a user's role or employee link changes. AUTH_CONTEXT_TTL=0 disables the
+    cache and reads the context on every request.
+    """
+    data = auth_cache.get_or_set(
+        'context',
+        {'user_id': user_id},
+        [f'user:{user_id}'],
+        lambda: _fetch_context(user_id),
+        ttl=current_app.config.get('AUTH_CONTEXT_TTL')
+    )
+    return AuthContext(**data) if data else None
+
+def _fetch_context(user_id):
+    row = db.session.query(
+        User.id, User.email, User.role, Employee.id.label('employee_id')
+    ).outerjoin(
+        Employee, Employee.user_id == User.id
+    ).filter(User.id == user_id).first()
+    return dict(row._mapping) if row else None
+
+def invalidate_auth_context(user_id):
+    """Forget the cached auth context of a user after a role or employee link change"""
+    auth_cache.invalidate(f'user:{user_id}')
+
+def auth_required():
+    """jwt_required() that also resolves the caller into ``g.current_user``
+    
+    ``g.current_user`` is None when the token's user has been deleted; routes
+    keep their own role checks, e.g. ``if not user or not user.can_process_payroll()``.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            g.current_user = load_auth_context(int(get_jwt_identity()))
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,186 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL"""
+    
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class RedisCacheBackend:
+    """Shared cache backend on Redis; values are stored as JSON"""
+    
+    def __init__(self, url, prefix='payroll:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('The redis package is required for the redis cache backend')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+    
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+    
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl or None)
+    
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+    
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+class TaggedCache:
+    """Response cache keyed by endpoint and arguments, invalidated by tags
+    
+    Every tag has a version token stored in the backend and folded into the
+    keys of entries carrying that tag. Invalidating a tag replaces its token,
+    so only the entries tagged with it stop matching; they then age out of the
+    backend. With the in-process backend an invalidation only reaches the
+    process that made it; other web workers, the job worker and CLI commands
+    keep serving their entries until they expire, so any deployment with more
+    than one process needs the shared (redis) backend.
+    """
+    
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.backend = None
+        self.ttl = None
+    
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        self.ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        if backend == 'redis':
+            self.backend = RedisCacheBackend(app.config['CACHE_REDIS_URL'])
+        elif backend == 'memory':
+            self.backend = MemoryCacheBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        else:
+            self.backend = None  # caching disabled
+    
+    @property
+    def shared(self):
+        """Whether entries and invalidations are shared by every process"""
+        return isinstance(self.backend, RedisCacheBackend)
+    
+    def get_or_set(self, endpoint, args, tags, compute, ttl=None):
+        """Return the cached value for endpoint/args, computing and storing it on a miss
+        
+        A ttl of 0 bypasses the cache; None uses the instance default.
+        """
+        if self.backend is None or ttl == 0:
+            return compute()
+        
+        key = self._entry_key(endpoint, args, tags)
+        value = self.backend.get(key)
+        if value is None:
+            value = compute()
+            self.backend.set(key, value, self.ttl if ttl is None else ttl)
+        return value
+    
+    def get(self, key):
+        """Plain (untagged) lookup of a value stored with set()"""
+        if self.backend is None:
+            return None
+        return self.backend.get(f'{self.namespace}:key:{key}')
+    
+    def set(self, key, value, ttl=None):
+        """Store a plain (untagged) value"""
+        if self.backend is not None:
+            self.backend.set(f'{self.namespace}:key:{key}', value, ttl or self.ttl)
+    
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags"""
+        if self.backend is None:
+            return
+        for tag in tags:
+            self.backend.set(self._tag_key(tag), uuid.uuid4().hex)
+    
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+    
+    def _tag_key(self, tag):
+        return f'{self.namespace}:tag:{tag}'
+    
+    def _tag_version(self, tag):
+        version = self.backend.get(self._tag_key(tag))
+        if version is None:
+            # Unknown (or evicted) tag: start a fresh version so no old entry can match
+            version = uuid.uuid4().hex
+            self.backend.set(self._tag_key(tag), version)
+        return version
+    
+    def _entry_key(self, endpoint, args, tags):
+        versions = ','.join(f'{tag}={self._tag_version(tag)}' for tag in sorted(tags))
+        arguments = json.dumps(args, sort_keys=True, default=str)
+        return f'{self.namespace}:{endpoint}:{arguments}:{versions}'
+
+def warn_if_process_local(app):
+    """Warn at server startup when caches are per process (see TaggedCache)"""
+    if app.config.get('CACHE_BACKEND', 'memory') == 'memory':
+        logger.warning(
+            'CACHE_BACKEND=memory keeps a separate cache in every process; invalidations by other '
+            'web workers, the job worker and CLI commands are only seen after CACHE_DEFAULT_TTL '
+            '(%ss). Set CACHE_BACKEND=redis.', app.config.get('CACHE_DEFAULT_TTL', 300)
+        )
+
+def period_tag(year=None, month=None):
+    """Tag for analytics entries covering one payroll period, or all periods"""
+    if year and month:
+        return f'period:{year}-{month}'
+    return 'period:all'
+
+analytics_cache = TaggedCache('analytics')
+facet_cache = TaggedCache('facets')
+auth_cache = TaggedCache('auth')
+replica_cache = TaggedCache('replica')
+
+def invalidate_payroll_period(year, month):
+    """Invalidate analytics entries affected by payslips changing in a period"""
+    analytics_cache.invalidate(period_tag(year, month), period_tag())
+
+def invalidate_employee_counts():
+    """Invalidate analytics entries that depend on the active employee count"""
+    analytics_cache.invalidate('employees')
+
+def invalidate_employee_facets():
+    """Invalidate cached employee facet counts after any employee change"""
+    facet_cache.invalidate('employees')
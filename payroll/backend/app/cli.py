@@ -0,0 +1,285 @@
+import os
+import signal
+import sys
+import time
+from datetime import date
+import click
+from flask.cli import AppGroup, with_appcontext
+
+analytics_cli = AppGroup('analytics', help='Analytics maintenance commands.')
+
+@analytics_cli.command('rebuild-rollup')
+def rebuild_rollup():
+    """Rebuild the payroll_rollups table from all payslips."""
+    from app.cache import analytics_cache
+    from app.services.analytics_service import AnalyticsService
+    
+    rows = AnalyticsService.rebuild_rollup()
+    analytics_cache.clear()
+    click.echo(f'Rebuilt payroll rollup: {rows} rows')
+
+@click.command('seed')
+@click.option('--employees', default=1000, show_default=True, help='Number of employees to generate.')
+@click.option('--months', default=12, show_default=True, help='Months of processed payroll history.')
+@click.option('--seed', 'seed_value', default=0, show_default=True, help='Random seed; same seed, same data.')
+@click.option('--end', help='Last payroll month as YYYY-MM (default: last month).')
+@click.option('--password', default='password123', show_default=True,
+              help='Password for the admin@payroll.com and finance@payroll.com logins.')
+@click.option('--reset', is_flag=True, help='Delete existing employee and payroll data first.')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=5000, show_default=True, help='Rows per bulk insert.')
+@with_appcontext
+def seed_command(employees, months, seed_value, end, password, reset, chunk_size):
+    """Generate a realistic dataset of employees and payroll history."""
+    from app.services.seed_service import SeedService
+    
+    end_period = None
+    if end:
+        try:
+            year, month = (int(part) for part in end.split('-'))
+            date(year, month, 1)
+        except ValueError:
+            raise click.BadParameter('Use YYYY-MM', param_hint='--end')
+        end_period = (year, month)
+    
+    started = time.perf_counter()
+    try:
+        counts = SeedService.seed(
+            employees, months=months, seed=seed_value, end=end_period, password=password,
+            reset=reset, chunk_size=chunk_size, progress=click.echo
+        )
+    except ValueError as e:
+        raise click.ClickException(f'{e} (pass --reset)')
+    
+    click.echo(', '.join(f'{count} {table}' for table, count in counts.items()))
+    click.echo(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+jobs_cli = AppGroup('jobs', help='Background job commands.')
+
+@jobs_cli.command('worker')
+@click.option('--poll-interval', type=float, help='Seconds to sleep when the queue is empty (default: JOB_POLL_INTERVAL).')
+@click.option('--max-jobs', type=int, help='Exit after running this many jobs.')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+def jobs_worker(poll_interval, max_jobs, burst):
+    """Run queued background jobs until stopped."""
+    from app.services.job_service import JobService
+    
+    # SIGTERM/SIGINT finish the current job, then stop
+    stopping = []
+    def stop(signum, frame):
+        click.echo('Stopping after the current job...')
+        stopping.append(signum)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    count = JobService.run_worker(
+        poll_interval=poll_interval, max_jobs=max_jobs, burst=burst, should_stop=lambda: bool(stopping)
+    )
+    click.echo(f'Ran {count} jobs')
+
+@jobs_cli.command('requeue-stale')
+@click.option('--stale-seconds', type=int, help='Heartbeat age that counts as abandoned (default: JOB_STALE_SECONDS).')
+def jobs_requeue_stale(stale_seconds):
+    """Requeue running jobs whose worker died."""
+    from app.services.job_service import JobService
+    
+    click.echo(f'Requeued or failed {JobService.requeue_stale(stale_seconds)} jobs')
+
+payroll_cli = AppGroup('payroll', help='Month-end payroll commands (chunked and resumable).')
+
+class ChunkReporter:
+    """Progress callback for the payroll commands
+    
+    Commits after every chunk, so work already done survives an interruption,
+    and prints throughput and the number of queries the chunk issued.
+    """
+    
+    def __init__(self, unit, queries):
+        self.unit = unit
+        self.queries = queries
+        self.started = self._last_time = time.perf_counter()
+        self.done = self.chunks = self._last_done = self._last_queries = 0
+    
+    def __call__(self, done, total=None):
+        from app import db
+        
+        db.session.commit()
+        self.done = done
+        now = time.perf_counter()
+        rate = (done - self._last_done) / max(now - self._last_time, 1e-9)
+        click.echo(f'  {done}/{total} {self.unit}  {rate:,.0f} {self.unit}/s  '
+                   f'{self.queries.count - self._last_queries} queries')
+        self.chunks += 1
+        self._last_time, self._last_done, self._last_queries = now, done, self.queries.count
+    
+    def summary(self, count):
+        elapsed = time.perf_counter() - self.started
+        per_chunk = self.queries.count / self.chunks if self.chunks else 0
+        click.echo(f'{count} {self.unit} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} {self.unit}/s), '
+                   f'{self.queries.count} queries ({per_chunk:.1f} per chunk)')
+
+def run_chunked(unit, operation):
+    """Run ``operation(progress)`` with a ChunkReporter; on Ctrl-C keep the committed chunks and abort"""
+    from app import db
+    from app.profiling import collect_queries
+    
+    with collect_queries() as queries:
+        reporter = ChunkReporter(unit, queries)
+        try:
+            result = operation(reporter)
+            db.session.commit()
+        except KeyboardInterrupt:
+            db.session.rollback()
+            click.echo(f'Interrupted after {reporter.done} {unit}; '
+                       'committed chunks are kept, run the command again to resume.')
+            raise click.Abort()
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(str(e))
+    return result, reporter
+
+@payroll_cli.command('create-runs')
+@click.option('--month', type=click.IntRange(1, 12), required=True, help='Payroll month (1-12).')
+@click.option('--year', type=int, required=True, help='Payroll year.')
+@click.option('--user', 'email', required=True, help='Email of the admin/HR user recorded as creator.')
+@click.option('--default-deductions', default=0.0, show_default=True, help='Deductions on every new run.')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=5000, show_default=True, help='Runs inserted per commit.')
+def payroll_create_runs(month, year, email, default_deductions, chunk_size):
+    """Create draft payroll runs for every active employee without one."""
+    from app.models import User
+    from app.services.payroll_service import PayrollService
+    
+    user = User.query.filter_by(email=email).first()
+    if not user or not user.can_process_payroll():
+        raise click.BadParameter('No admin or HR user with that email', param_hint='--user')
+    
+    result, reporter = run_chunked('employees', lambda progress: PayrollService.create_bulk_payroll_runs(
+        month, year, default_deductions, user.id, chunk_size=chunk_size, progress=progress
+    ))
+    reporter.summary(result['success_count'])
+    click.echo(f"Created {result['success_count']} runs, skipped {result['skipped_count']} "
+               f"with an existing run, {result['error_count']} errors")
+    for error in result['errors'][:10]:
+        click.echo(f'  {error}')
+
+@payroll_cli.command('process')
+@click.option('--month', type=click.IntRange(1, 12), required=True, help='Payroll month (1-12).')
+@click.option('--year', type=int, required=True, help='Payroll year.')
+@click.option('--department', help='Only process runs of this department.')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=500, show_default=True, help='Runs processed per commit.')
+def payroll_process(month, year, department, chunk_size):
+    """Process the month's draft runs into payslips."""
+    from app.cache import invalidate_payroll_period
+    from app.services.payroll_service import PayrollService
+    
+    # Processed runs are no longer drafts, so a rerun picks up where the last one stopped
+    run_ids = PayrollService.find_draft_runs(month, year, department)
+    click.echo(f'{len(run_ids)} draft runs to process')
+    try:
+        result, reporter = run_chunked('employees', lambda progress: PayrollService.process_payroll_runs(
+            month, year, run_ids, chunk_size, progress
+        ))
+    finally:
+        invalidate_payroll_period(year, month)
+    reporter.summary(result['processed_count'])
+    click.echo(f"Processed {result['processed_count']} runs into {result['payslip_count']} payslips")
+
+@payroll_cli.command('render-pdfs')
+@click.option('--month', type=click.IntRange(1, 12), required=True, help='Payroll month (1-12).')
+@click.option('--year', type=int, required=True, help='Payroll year.')
+@click.option('--department', help='Only render payslips of this department.')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=100, show_default=True, help='Payslips per progress line.')
+@click.option('--workers', type=click.IntRange(min=1), help='Render processes (default: PDF_RENDER_WORKERS, or one per CPU).')
+def payroll_render_pdfs(month, year, department, chunk_size, workers):
+    """Render the month's payslip PDFs into the PDF cache across a process pool."""
+    from app.services.pdf_cache import PDFCache
+    
+    # Cached payslips are skipped, so a rerun only renders what is missing
+    result, reporter = run_chunked('payslips', lambda progress: PDFCache.render_month(
+        month, year, department, chunk_size, progress, workers=workers
+    ))
+    reporter.summary(sum(result.values()))
+    click.echo(f"Rendered {result['rendered_count']} PDFs, {result['cached_count']} already cached, "
+               f"{result['failed_count']} failed")
+    if result['failed_count']:
+        raise click.ClickException('Some payslips failed to render; see the log, then rerun the command')
+
+schema_cli = AppGroup('schema', help='Database schema version commands.')
+
+@schema_cli.command('check')
+def schema_check():
+    """Compare the database schema version with the code's."""
+    from app.schema import SCHEMA_VERSION, check_schema
+    
+    try:
+        version = check_schema(strict=True)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Schema version {version} (code expects {SCHEMA_VERSION})')
+
+@schema_cli.command('init')
+def schema_init():
+    """Create all tables on an empty development database and mark it current."""
+    from app.schema import init_schema
+    
+    click.echo(f'Schema created at version {init_schema()}')
+
+@click.command('startup-profile')
+@click.option('--config', 'config_name', default=lambda: os.getenv('FLASK_ENV', 'development'),
+              show_default='FLASK_ENV or development', help='Configuration to build the app with.')
+@click.option('--top', default=15, show_default=True, help='Packages and app modules to list.')
+def startup_profile_command(config_name, top):
+    """Report import and create_app time per package in a fresh interpreter."""
+    from app.startup import profile_startup
+    
+    try:
+        report = profile_startup(config_name)
+    except RuntimeError as e:
+        raise click.ClickException(f'App failed to start: {e}')
+    
+    click.echo(f'import app      {report["import_ms"]:8.1f} ms')
+    click.echo(f'create_app()    {report["create_app_ms"]:8.1f} ms')
+    click.echo(f'modules loaded  {report["modules"]:8d}')
+    click.echo('\nSlowest packages (own import time):')
+    for name, package in report['packages'][:top]:
+        click.echo(f'  {package["ms"]:8.1f} ms  {name} ({package["modules"]} modules)')
+    click.echo('\nApp modules (including their imports):')
+    for name, ms in report['app_modules'][:top]:
+        click.echo(f'  {ms:8.1f} ms  {name}')
+    heavy = ', '.join(report['heavy_modules']) or 'none'
+    click.echo(f'\nHeavy optional modules loaded at startup: {heavy}')
+
+@click.command('serve', context_settings={'ignore_unknown_options': True})
+@click.option('--bind', help='Address to listen on (default: WEB_BIND, or 0.0.0.0:$PORT).')
+@click.option('--workers', type=int, help='Worker processes (default: WEB_CONCURRENCY, or 2 x CPUs + 1).')
+@click.option('--threads', type=int, help='Threads per worker (default: WEB_THREADS, or 1).')
+@click.argument('gunicorn_args', nargs=-1, type=click.UNPROCESSED)
+def serve_command(bind, workers, threads, gunicorn_args):
+    """Serve the API with gunicorn and gunicorn.conf.py; extra arguments go to gunicorn."""
+    import importlib.util
+    
+    if importlib.util.find_spec('gunicorn') is None:
+        raise click.ClickException('gunicorn is not installed (pip install -r requirements.txt)')
+    
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    args = [sys.executable, '-m', 'gunicorn', '--config', os.path.join(backend_dir, 'gunicorn.conf.py'),
+            '--chdir', backend_dir]
+    if bind:
+        args += ['--bind', bind]
+    if workers:
+        args += ['--workers', str(workers)]
+    if threads:
+        # gunicorn switches sync workers to gthread when threads > 1
+        args += ['--threads', str(threads)]
+    args += [*gunicorn_args, 'wsgi:app']
+    # Replace this process so gunicorn's master receives signals directly
+    os.execv(sys.executable, args)
+
+def register_commands(app):
+    """Register CLI command groups on the app"""
+    app.cli.add_command(analytics_cli)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(payroll_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(startup_profile_command)
+    app.cli.add_command(serve_command)
@@ -6,8 +6,12 @@ from .deduction import Deduction
 from .payroll_run import PayrollRun
 from .payslip import Payslip
 from .payslip_detail import PayslipDetail
+from .payroll_rollup import PayrollRollup
+from .job import Job
+from .schema_migration import SchemaMigration
 
 __all__ = [
     'User', 'Employee', 'Salary', 'Allowance', 'Deduction',
-    'PayrollRun', 'Payslip', 'PayslipDetail'
+    'PayrollRun', 'Payslip', 'PayslipDetail', 'PayrollRollup', 'Job',
+    'SchemaMigration'
 ]
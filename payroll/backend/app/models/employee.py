@@ -34,6 +34,17 @@ class Employee(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     
+    # Seek indexes for keyset pagination of the active employee list
+    __table_args__ = (
+        db.Index('idx_employees_active_name_id', 'is_active', 'name', 'id'),
+        db.Index('idx_employees_active_created_at_id', 'is_active', 'created_at', 'id'),
+        # Search index; other backends use the in-process trigram index instead
+        db.Index(
+            'ft_employees_search', 'name', 'email', 'employee_id', 'position',
+            mysql_prefix='FULLTEXT'
+        ).ddl_if(dialect='mysql'),
+    )
+    
     # Relationships
     user = db.relationship('User', back_populates='employee')
     salaries = db.relationship('Salary', back_populates='employee', cascade='all, delete-orphan')
@@ -42,13 +53,20 @@ class Employee(db.Model):
     payslips = db.relationship('Payslip', back_populates='employee', cascade='all, delete-orphan')
     payroll_runs = db.relationship('PayrollRun', back_populates='employee', cascade='all, delete-orphan')
     
+    # Salaries still in effect today, newest first. Load with selectinload() when
+    # serializing lists so every page resolves current salaries in one query.
+    active_salaries = db.relationship(
+        'Salary',
+        primaryjoin='and_(Employee.id == Salary.employee_id, '
+                    'Salary.start_date <= func.current_date(), '
+                    'or_(Salary.end_date.is_(None), Salary.end_date >= func.current_date()))',
+        order_by='Salary.start_date.desc()',
+        viewonly=True
+    )
+    
     def to_dict(self):
         # Get current salary
-        current_salary = None
-        for salary in self.salaries:
-            if salary.end_date is None or salary.end_date >= db.func.current_date():
-                current_salary = salary.basic_salary
-                break
+        current_salary = self.active_salaries[0].basic_salary if self.active_salaries else None
         
         return {
             'id': self.id,
@@ -0,0 +1,45 @@
+from app import db
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, succeeded, failed, cancelled
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    progress_current = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(100))
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    # Workers claim the oldest queued job first
+    __table_args__ = (
+        db.Index('idx_jobs_status_id', 'status', 'id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.job_type,
+            'status': self.status,
+            'params': self.params,
+            'progress': {
+                'current': self.progress_current,
+                'total': self.progress_total,
+                'percent': round(100 * self.progress_current / self.progress_total, 1)
+                if self.progress_total else None
+            },
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,33 @@
+from app import db
+
+class PayrollRollup(db.Model):
+    __tablename__ = 'payroll_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    department = db.Column(db.String(100), nullable=False, default='')  # '' = unassigned
+    payslip_count = db.Column(db.Integer, nullable=False, default=0)
+    # DECIMAL(15, 2) as in scripts/005_add_payroll_rollups.sql, read back as float
+    total_gross = db.Column(db.Numeric(15, 2, asdecimal=False), nullable=False, default=0.0)
+    total_tax = db.Column(db.Numeric(15, 2, asdecimal=False), nullable=False, default=0.0)
+    total_deductions = db.Column(db.Numeric(15, 2, asdecimal=False), nullable=False, default=0.0)
+    total_net = db.Column(db.Numeric(15, 2, asdecimal=False), nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+    
+    # One rollup row per period and department
+    __table_args__ = (
+        db.UniqueConstraint('year', 'month', 'department', name='uk_payroll_rollups_period_department'),
+    )
+    
+    def to_dict(self):
+        return {
+            'year': self.year,
+            'month': self.month,
+            'department': self.department or 'Unassigned',
+            'payslip_count': self.payslip_count,
+            'total_gross': float(self.total_gross),
+            'total_tax': float(self.total_tax),
+            'total_deductions': float(self.total_deductions),
+            'total_net': float(self.total_net)
+        }
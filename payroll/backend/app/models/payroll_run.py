@@ -18,6 +18,7 @@ class PayrollRun(db.Model):
     # Add unique constraint for one payroll per employee per month
     __table_args__ = (
         db.UniqueConstraint('employee_id', 'month', 'year', name='uk_payroll_runs_employee_month_year'),
+        db.Index('idx_payroll_runs_year_month_id', 'year', 'month', 'id'),
     )
     
     # Relationships
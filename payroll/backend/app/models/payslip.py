@@ -4,7 +4,7 @@ class Payslip(db.Model):
     __tablename__ = 'payslips'
     
     id = db.Column(db.Integer, primary_key=True)
-    payroll_run_id = db.Column(db.Integer, db.ForeignKey('payroll_runs.id'), nullable=False, index=True)
+    payroll_run_id = db.Column(db.Integer, db.ForeignKey('payroll_runs.id'), nullable=False, unique=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False, index=True)
     basic_salary = db.Column(db.Float, nullable=False)
     total_allowances = db.Column(db.Float, default=0)
@@ -18,6 +18,11 @@ class Payslip(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     
+    # Seek index for keyset pagination
+    __table_args__ = (
+        db.Index('idx_payslips_created_at_id', 'created_at', 'id'),
+    )
+    
     # Relationships
     payroll_run = db.relationship('PayrollRun', back_populates='payslips')
     employee = db.relationship('Employee', back_populates='payslips')
@@ -0,0 +1,8 @@
+from app import db
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+    
+    # Number of the scripts/NNN_*.sql migration that has been applied
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    applied_at = db.Column(db.DateTime, default=db.func.current_timestamp())
@@ -0,0 +1,68 @@
+import base64
+import json
+from sqlalchemy import and_, or_, select
+
+MAX_CURSOR_LIMIT = 500
+
+class CursorError(ValueError):
+    """Raised for malformed cursors or cursors issued for a different sort order"""
+
+def wants_cursor(args):
+    """Cursor mode is opt-in: it is used when the request passes cursor or limit"""
+    return 'cursor' in args or 'limit' in args
+
+def encode_cursor(sort_key, last_id):
+    """Encode the primary key of the last row of a page as an opaque cursor"""
+    raw = json.dumps({'s': sort_key, 'k': last_id}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(sort_key, cursor):
+    """Decode a cursor back into a primary key, checking it matches the sort order"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        last_id = payload['k']
+    except (ValueError, KeyError, TypeError):
+        raise CursorError('Invalid cursor')
+    if payload.get('s') != sort_key or not isinstance(last_id, int):
+        raise CursorError('Cursor does not match the requested sort order')
+    return last_id
+
+def keyset_page(query, columns, sort_key, cursor=None, limit=20, descending=False):
+    """Fetch one page by seeking past the cursor on an indexed sort key
+
+    ``columns`` is the ordered sort key and must end with the primary key so
+    every row has a distinct position. The cursor only carries that key; the
+    other sort values of the anchor row are read back by primary key inside
+    the seek predicate, so they are always compared in the database's own
+    representation. Returns the rows and the next cursor (None on the last page).
+    """
+    limit = max(1, min(limit, MAX_CURSOR_LIMIT))
+    pk = columns[-1]
+    
+    if cursor:
+        last_id = decode_cursor(sort_key, cursor)
+        anchor = [
+            select(column).where(pk == last_id).scalar_subquery()
+            for column in columns[:-1]
+        ]
+        query = query.filter(_seek_predicate(columns, anchor + [last_id], descending))
+    
+    order = [c.desc() if descending else c.asc() for c in columns]
+    rows = query.order_by(None).order_by(*order).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort_key, getattr(rows[-1], pk.key))
+    return rows, next_cursor
+
+def _seek_predicate(columns, values, descending):
+    # (a, b, c) > (x, y, z) expanded as a > x OR (a = x AND (b > y OR (b = y AND c > z)))
+    # which every backend can drive from a composite index
+    column, value = columns[-1], values[-1]
+    predicate = column < value if descending else column > value
+    for column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+        beyond = column < value if descending else column > value
+        predicate = or_(beyond, and_(column == value, predicate))
+    return predicate
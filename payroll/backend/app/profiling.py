@@ -0,0 +1,133 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Collectors currently receiving query events in this context
+_collectors = ContextVar('sql_collectors', default=())
+_listeners_installed = False
+
+class QueryStats:
+    """Query count, DB time and slowest statement seen by one collector"""
+    
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.statements = [] if keep_statements else None
+    
+    def record(self, statement, duration):
+        self.count += 1
+        self.db_time += duration
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements.append(statement)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors.get()
+    if not collectors:
+        return
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    for stats in collectors:
+        stats.record(statement, duration)
+
+def install_listeners():
+    """Attach the cursor event hooks to every engine (idempotent)"""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _listeners_installed = True
+
+@contextmanager
+def collect_queries(keep_statements=False):
+    """Record every SQL statement executed in this context into a QueryStats"""
+    install_listeners()
+    stats = QueryStats(keep_statements)
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail with the executed statements if the block runs more than ``limit`` queries
+    
+    Usage::
+    
+        with assert_max_queries(3):
+            client.get('/api/payslips?per_page=50', headers=headers)
+    """
+    with collect_queries(keep_statements=True) as stats:
+        yield stats
+    if stats.count > limit:
+        listing = '\n'.join(f'  {i}. {s}' for i, s in enumerate(stats.statements, 1))
+        raise AssertionError(f'Expected at most {limit} queries, got {stats.count}:\n{listing}')
+
+def init_app(app):
+    """Enable per-request SQL/latency profiling when SQL_PROFILING is set"""
+    if not app.config.get('SQL_PROFILING'):
+        return
+    
+    install_listeners()
+    slow_ms = app.config.get('SQL_PROFILING_SLOW_MS', 0)
+    
+    @app.before_request
+    def _start_profile():
+        g._profile_started = time.perf_counter()
+        g._profile_stats = QueryStats()
+        g._profile_token = _collectors.set(_collectors.get() + (g._profile_stats,))
+    
+    @app.after_request
+    def _finish_profile(response):
+        stats = g.pop('_profile_stats', None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - g.pop('_profile_started')) * 1000
+        db_ms = stats.db_time * 1000
+        
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.2f};desc="{stats.count} queries", '
+            f'app;dur={total_ms - db_ms:.2f}, total;dur={total_ms:.2f}'
+        )
+        
+        if total_ms >= slow_ms:
+            logger.info(json.dumps({
+                'event': 'request_profile',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'queries': stats.count,
+                'db_ms': round(db_ms, 2),
+                'python_ms': round(total_ms - db_ms, 2),
+                'total_ms': round(total_ms, 2),
+                'slowest_ms': round(stats.slowest_time * 1000, 2),
+                'slowest_statement': stats.slowest_statement
+            }))
+        return response
+    
+    @app.teardown_request
+    def _stop_profile(exc):
+        token = g.pop('_profile_token', None)
+        if token is not None:
+            _collectors.reset(token)
@@ -0,0 +1,83 @@
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+
+class RoutingSession(Session):
+    """Session that sends reads of read-only requests to the replica bind
+    
+    A SELECT goes to the replica when all of these hold: a 'replica' bind is
+    configured, the request is a GET/HEAD not marked with @primary_only, this
+    session has not written anything yet, and the current user has not written
+    within REPLICA_STICKY_SECONDS. Everything else (writes, flushes, CLI
+    commands, reads after a write, and reads before auth_required has
+    resolved the caller, such as the auth context itself) uses the primary.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None and not isinstance(clause, Select):
+            self.info['wrote'] = True
+        elif bind is None and clause is None and mapper is not None:
+            self.info['wrote'] = True  # unit of work flush
+        elif bind is None and self._use_replica():
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+    
+    def _use_replica(self):
+        if self.info.get('wrote') or not has_request_context():
+            return False
+        if request.method not in READ_METHODS or g.get('_use_primary'):
+            return False
+        if REPLICA_BIND not in self._db.engines:
+            return False
+        return not _pinned_to_primary()
+
+def _pinned_to_primary():
+    """Whether the current user wrote recently enough that replica lag could hide it
+    
+    Until auth_required has set ``g.current_user`` the caller is unknown, so
+    the answer is yes and nothing is memoized.
+    """
+    if 'current_user' not in g:
+        return True
+    if '_primary_pin' not in g:
+        from app.cache import replica_cache
+        user = g.current_user
+        g._primary_pin = bool(user is not None and replica_cache.get(f'pin:{user.id}'))
+    return g._primary_pin
+
+def primary_only(fn):
+    """Keep every query of a read-only endpoint on the primary"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g._use_primary = True
+        return fn(*args, **kwargs)
+    return wrapper
+
+def init_app(app):
+    """Pin users to the primary for a short while after requests that wrote
+    
+    The pins live in replica_cache, so every process has to see them: outside
+    testing, a replica bind requires a shared (redis) cache backend.
+    """
+    from app.cache import replica_cache
+    if REPLICA_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+    if not replica_cache.shared and not app.testing:
+        raise RuntimeError(
+            'A read replica needs CACHE_BACKEND=redis: with a per-process cache, '
+            'a user who wrote is not kept on the primary by the other workers'
+        )
+    
+    @app.after_request
+    def _pin_writers(response):
+        from app import db
+        user = g.get('current_user')
+        if user is not None and db.session().info.get('wrote'):
+            ttl = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+            if ttl:
+                replica_cache.set(f'pin:{user.id}', True, ttl)
+        return response
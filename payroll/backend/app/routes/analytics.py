@@ -1,17 +1,17 @@
-from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, g
 from app import db
-from app.models import Payslip, User, PayrollRun, Employee
-from sqlalchemy import func, extract
+from app.auth import auth_required
+from app.cache import analytics_cache, period_tag
+from app.models import Employee, PayrollRollup
+from sqlalchemy import func
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
 
 @analytics_bp.route('/summary', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_summary():
     """Get overall payroll summary"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or not user.can_view_analytics():
         return {'error': 'Unauthorized'}, 401
@@ -19,31 +19,18 @@ def get_summary():
     year = request.args.get('year', type=int)
     month = request.args.get('month', type=int)
     
-    query = Payslip.query
-    
-    if year and month:
-        query = query.join(PayrollRun).filter(
-            PayrollRun.year == year,
-            PayrollRun.month == month
-        )
-    
-    total_payroll = db.session.query(func.sum(Payslip.net_salary)).select_from(query).scalar() or 0
-    total_employees = Employee.query.filter_by(is_active=True).count()
-    total_payslips = query.count()
-    
-    return {
-        'total_payroll': float(total_payroll),
-        'total_employees': total_employees,
-        'total_payslips': total_payslips,
-        'average_salary': float(total_payroll / total_employees) if total_employees > 0 else 0
-    }, 200
+    return analytics_cache.get_or_set(
+        'summary',
+        {'year': year, 'month': month},
+        [period_tag(year, month), 'employees'],
+        lambda: _summary(year, month)
+    ), 200
 
 @analytics_bp.route('/department-distribution', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_department_distribution():
     """Get salary distribution by department"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or not user.can_view_analytics():
         return {'error': 'Unauthorized'}, 401
@@ -51,49 +38,87 @@ def get_department_distribution():
     year = request.args.get('year', type=int)
     month = request.args.get('month', type=int)
     
+    return analytics_cache.get_or_set(
+        'department-distribution',
+        {'year': year, 'month': month},
+        [period_tag(year, month)],
+        lambda: _department_distribution(year, month)
+    ), 200
+
+@analytics_bp.route('/monthly-trend', methods=['GET'])
+@auth_required()
+def get_monthly_trend():
+    """Get monthly payroll trends"""
+    user = g.current_user
+    
+    if not user or not user.can_view_analytics():
+        return {'error': 'Unauthorized'}, 401
+    
+    return analytics_cache.get_or_set(
+        'monthly-trend',
+        {},
+        [period_tag()],
+        _monthly_trend
+    ), 200
+
+def _summary(year, month):
     query = db.session.query(
-        Employee.department,
-        func.count(Payslip.id).label('count'),
-        func.sum(Payslip.net_salary).label('total')
-    ).join(Payslip).join(PayrollRun)
+        func.sum(PayrollRollup.total_net),
+        func.sum(PayrollRollup.payslip_count)
+    )
     
     if year and month:
         query = query.filter(
-            PayrollRun.year == year,
-            PayrollRun.month == month
+            PayrollRollup.year == year,
+            PayrollRollup.month == month
         )
     
-    results = query.group_by(Employee.department).all()
+    total_payroll, total_payslips = query.one()
+    total_payroll = total_payroll or 0
+    total_employees = Employee.query.filter_by(is_active=True).count()
+    
+    return {
+        'total_payroll': float(total_payroll),
+        'total_employees': total_employees,
+        'total_payslips': int(total_payslips or 0),
+        'average_salary': float(total_payroll / total_employees) if total_employees > 0 else 0
+    }
+
+def _department_distribution(year, month):
+    query = db.session.query(
+        PayrollRollup.department,
+        func.sum(PayrollRollup.payslip_count).label('count'),
+        func.sum(PayrollRollup.total_net).label('total')
+    )
+    
+    if year and month:
+        query = query.filter(
+            PayrollRollup.year == year,
+            PayrollRollup.month == month
+        )
+    
+    results = query.group_by(PayrollRollup.department).order_by(PayrollRollup.department).all()
     
     return {
         'departments': [
             {
                 'department': r[0] or 'Unassigned',
-                'employee_count': r[1],
+                'employee_count': int(r[1]),
                 'total_salary': float(r[2])
             }
             for r in results
         ]
-    }, 200
+    }
 
-@analytics_bp.route('/monthly-trend', methods=['GET'])
-@jwt_required()
-def get_monthly_trend():
-    """Get monthly payroll trends"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if not user or not user.can_view_analytics():
-        return {'error': 'Unauthorized'}, 401
-    
+def _monthly_trend():
     results = db.session.query(
-        PayrollRun.year,
-        PayrollRun.month,
-        func.sum(Payslip.net_salary).label('total'),
-        func.count(Payslip.id).label('count')
-    ).join(Payslip).group_by(
-        PayrollRun.year, PayrollRun.month
-    ).order_by(PayrollRun.year, PayrollRun.month).all()
+        PayrollRollup.year,
+        PayrollRollup.month,
+        func.sum(PayrollRollup.total_net).label('total'),
+        func.sum(PayrollRollup.payslip_count).label('count')
+    ).group_by(
+        PayrollRollup.year, PayrollRollup.month
+    ).order_by(PayrollRollup.year, PayrollRollup.month).all()
     
     return {
         'trends': [
@@ -101,8 +126,8 @@ def get_monthly_trend():
                 'year': r[0],
                 'month': r[1],
                 'total_payroll': float(r[2]),
-                'employee_count': r[3]
+                'employee_count': int(r[3])
             }
             for r in results
         ]
-    }, 200
+    }
@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app import db
+from app.auth import invalidate_auth_context
 from app.models import User, Employee
+import logging
+
+logger = logging.getLogger(__name__)
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -50,6 +54,7 @@ def register():
             employee.user_id = user.id
     
     db.session.commit()
+    invalidate_auth_context(user.id)
     
     return {'message': 'User created successfully', 'user': user.to_dict()}, 201
 
@@ -58,25 +63,23 @@ def login():
     """Login user"""
     data = request.get_json()
     
-    print(f"DEBUG: Received login data: {data}")  # Debug line
-    
     if not data or not data.get('email') or not data.get('password'):
-        print("DEBUG: Missing email or password")  # Debug line
+        logger.debug('Login rejected: missing email or password')
         return {'error': 'Missing email or password'}, 400
     
     user = User.query.filter_by(email=data['email']).first()
     
     if not user:
-        print(f"DEBUG: User not found for email: {data['email']}")  # Debug line
+        logger.info('Login failed: unknown email')
         return {'error': 'Invalid email or password'}, 401
     
     if not user.check_password(data['password']):
-        print(f"DEBUG: Password check failed for user: {data['email']}")  # Debug line
+        logger.info('Login failed: bad password for user %s', user.id)
         return {'error': 'Invalid email or password'}, 401
     
     access_token = create_access_token(identity=str(user.id))  # Convert to string
     
-    print(f"DEBUG: Login successful for user: {data['email']}, token created with identity: {str(user.id)}")  # Debug line
+    logger.debug('Login successful for user %s', user.id)
     
     # Include employee information if user is linked to an employee
     employee_data = None
@@ -1,12 +1,23 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, request, jsonify, g
 from app import db
-from app.models import Employee, User, Salary, Allowance, Deduction
+from app.auth import auth_required
+from app.cache import invalidate_employee_counts, invalidate_employee_facets
+from app.pagination import wants_cursor, keyset_page, CursorError
+from app.services.search_service import EmployeeSearch
+from app.services.facet_service import EmployeeFacets
+from app.models import Employee, Salary, Allowance, Deduction
 from datetime import date
+from sqlalchemy.orm import selectinload
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 employee_bp = Blueprint('employees', __name__, url_prefix='/api/employees')
 
+# Sort fields usable with cursor pagination (non-null, so every row has a position)
+CURSOR_SORT_FIELDS = ['name', 'email', 'employee_id']
+
 def validate_employee_data(data, is_update=False):
     """Validate employee input data"""
     errors = []
@@ -77,18 +88,14 @@ def validate_employee_data(data, is_update=False):
     return errors
 
 @employee_bp.route('', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_employees():
     """Get all employees with advanced pagination, search and filtering"""
-    current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or not user.can_manage_employees():
         return {'error': 'Unauthorized'}, 401
     try:
-        current_user_id = int(get_jwt_identity())  # Convert back to int
-        print(f"DEBUG GET: Current user ID: {current_user_id}")  # Debug
-        
         # Pagination parameters
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 100)  # Max 100 per page
@@ -109,15 +116,11 @@ def get_employees():
         
         query = Employee.query.filter_by(is_active=True)  # Only active employees
         
-        # Apply search filter
+        # Apply search filter (indexed, relevance ranked)
+        relevance = None
+        search_truncated = False
         if search:
-            query = query.filter(db.or_(
-                Employee.name.ilike(f'%{search}%'),
-                Employee.email.ilike(f'%{search}%'),
-                Employee.employee_id.ilike(f'%{search}%'),
-                Employee.position.ilike(f'%{search}%'),
-                Employee.address.ilike(f'%{search}%')
-            ))
+            query, relevance, search_truncated = EmployeeSearch.apply(query, search)
         
         # Apply filters
         if department:
@@ -142,58 +145,98 @@ def get_employees():
             except ValueError:
                 return {'error': 'Invalid hire_date_to format. Use YYYY-MM-DD'}, 400
         
-        # Apply sorting
+        # Apply sorting; searches rank by relevance unless a sort is requested
         valid_sort_fields = ['name', 'email', 'employee_id', 'department', 'hire_date', 'created_at']
-        if sort_by in valid_sort_fields:
+        if relevance is not None and 'sort_by' not in request.args:
+            query = query.order_by(relevance, Employee.id)
+        elif sort_by in valid_sort_fields:
             sort_column = getattr(Employee, sort_by)
             if sort_order.lower() == 'desc':
                 query = query.order_by(sort_column.desc())
             else:
                 query = query.order_by(sort_column.asc())
         
-        employees = query.paginate(page=page, per_page=per_page, error_out=False)
+        filters = {
+            'search': search,
+            'department': department,
+            'employment_type': employment_type,
+            'gender': gender,
+            'hire_date_from': hire_date_from,
+            'hire_date_to': hire_date_to
+        }
         
-        # Get summary statistics for the filtered results
-        total_count = query.count()
-        departments = db.session.query(Employee.department, db.func.count(Employee.id)).filter(query.whereclause).group_by(Employee.department).all()
-        employment_types = db.session.query(Employee.employment_type, db.func.count(Employee.id)).filter(query.whereclause).group_by(Employee.employment_type).all()
+        # Opt-in keyset pagination on (sort column, id); skips counts unless asked
+        if wants_cursor(request.args):
+            if sort_by not in CURSOR_SORT_FIELDS:
+                return {'error': f'Cursor pagination supports sort_by in {CURSOR_SORT_FIELDS}'}, 400
+            descending = sort_order.lower() == 'desc'
+            limit = min(request.args.get('limit', per_page, type=int), 100)
+            try:
+                items, next_cursor = keyset_page(
+                    query.options(selectinload(Employee.active_salaries)),
+                    [getattr(Employee, sort_by), Employee.id],
+                    f"employees:{sort_by}:{'desc' if descending else 'asc'}",
+                    cursor=request.args.get('cursor'),
+                    limit=limit,
+                    descending=descending
+                )
+            except CursorError as e:
+                return {'error': str(e)}, 400
+            
+            pagination = {
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None,
+                'limit': limit,
+                'search_truncated': search_truncated
+            }
+            if request.args.get('include_total', 'false').lower() in ('1', 'true'):
+                pagination['total'] = EmployeeFacets.compute(query.whereclause, filters)['total']
+            return {
+                'employees': [emp.to_dict() for emp in items],
+                'pagination': pagination,
+                'filters': filters
+            }, 200
+        
+        employees = query.options(
+            selectinload(Employee.active_salaries)
+        ).paginate(page=page, per_page=per_page, error_out=False, count=False)
+        
+        # Total and summary statistics for the filtered results in one scan
+        facets = EmployeeFacets.compute(
+            query.whereclause, filters, facets=['department', 'employment_type']
+        )
+        total_count = facets['total']
+        pages = -(-total_count // per_page) if total_count else 0
         
         return {
             'employees': [emp.to_dict() for emp in employees.items],
             'pagination': {
-                'total': employees.total,
-                'pages': employees.pages,
+                'total': total_count,
+                'pages': pages,
                 'current_page': page,
                 'per_page': per_page,
-                'has_next': employees.has_next,
-                'has_prev': employees.has_prev
-            },
-            'filters': {
-                'search': search,
-                'department': department,
-                'employment_type': employment_type,
-                'gender': gender,
-                'hire_date_from': hire_date_from,
-                'hire_date_to': hire_date_to
+                'has_next': page < pages,
+                'has_prev': page > 1,
+                'search_truncated': search_truncated
             },
+            'filters': filters,
             'summary': {
                 'total_filtered': total_count,
-                'departments': [{'name': d[0], 'count': d[1]} for d in departments if d[0]],
-                'employment_types': [{'name': e[0], 'count': e[1]} for e in employment_types if e[0]]
+                'departments': [{'name': d[0], 'count': d[1]} for d in facets['department'] if d[0]],
+                'employment_types': [{'name': e[0], 'count': e[1]} for e in facets['employment_type'] if e[0]]
             }
         }, 200
     
     except Exception as e:
-        print(f"DEBUG GET: Error in get_employees: {e}")  # Debug
+        logger.exception('Failed to fetch employees')
         return {'error': f'Failed to fetch employees: {str(e)}'}, 500
 
 @employee_bp.route('/<int:employee_id>', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_employee(employee_id):
     """Get comprehensive employee details"""
     try:
-        current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
+        user = g.current_user
         
         if not user or not user.can_manage_employees():
             return {'error': 'Unauthorized'}, 401
@@ -256,26 +299,22 @@ def get_employee(employee_id):
         return data, 200
         
     except Exception as e:
-        print(f"ERROR: Failed to get employee {employee_id}: {e}")
+        logger.exception('Failed to get employee %s', employee_id)
         return {'error': f'Failed to fetch employee details: {str(e)}'}, 500
 
 @employee_bp.route('', methods=['POST'])
-@jwt_required()
+@auth_required()
 def create_employee():
     """Create new employee"""
     try:
-        current_user_id = int(get_jwt_identity())  # Convert back to int
-        print(f"DEBUG POST: Current user ID: {current_user_id}")  # Debug
-        
-        user = User.query.get(current_user_id)
-        print(f"DEBUG POST: User found: {user}, Role: {user.role if user else 'None'}")  # Debug
+        user = g.current_user
         
         if not user or user.role not in ['admin', 'finance']:
-            print(f"DEBUG POST: Unauthorized - User role: {user.role if user else 'None'}")  # Debug
+            logger.debug('Unauthorized employee create by user %s', user.id if user else None)
             return {'error': 'Unauthorized'}, 401
         
         data = request.get_json()
-        print(f"DEBUG POST: Received employee data: {data}")  # Debug
+        logger.debug('Create employee request with fields %s', sorted(data) if data else None)
         
         # Validate input data
         validation_errors = validate_employee_data(data, is_update=False)
@@ -283,15 +322,15 @@ def create_employee():
             return {'error': 'Validation failed', 'details': validation_errors}, 400
         
         if not data or not data.get('name') or not data.get('email') or not data.get('employee_id'):
-            print(f"DEBUG POST: Missing required fields - Name: {data.get('name') if data else 'None'}, Email: {data.get('email') if data else 'None'}, Employee ID: {data.get('employee_id') if data else 'None'}")  # Debug
+            logger.debug('Create employee rejected: missing required fields')
             return {'error': 'Missing required fields'}, 400
         
         if Employee.query.filter_by(email=data['email']).first():
-            print(f"DEBUG POST: Email already exists: {data['email']}")  # Debug
+            logger.debug('Create employee rejected: email already exists')
             return {'error': 'Email already exists'}, 400
         
         if Employee.query.filter_by(employee_id=data['employee_id']).first():
-            print(f"DEBUG POST: Employee ID already exists: {data['employee_id']}")  # Debug
+            logger.debug('Create employee rejected: employee ID %s already exists', data['employee_id'])
             return {'error': 'Employee ID already exists'}, 400
         
         employee = Employee(
@@ -334,23 +373,22 @@ def create_employee():
             db.session.add(salary)
         
         db.session.commit()
+        invalidate_employee_counts()
+        invalidate_employee_facets()
         
-        print(f"DEBUG POST: Employee created successfully: {employee.to_dict()}")  # Debug
+        logger.info('Employee %s created by user %s', employee.id, user.id)
         return {'message': 'Employee created', 'employee': employee.to_dict()}, 201
     
     except Exception as e:
-        print(f"DEBUG POST: Error creating employee: {e}")  # Debug
-        import traceback
-        traceback.print_exc()  # Print full traceback
+        logger.exception('Error creating employee')
         db.session.rollback()
         return {'error': f'Database error: {str(e)}'}, 422
 
 @employee_bp.route('/<int:employee_id>', methods=['PUT'])
-@jwt_required()
+@auth_required()
 def update_employee(employee_id):
     """Update employee"""
-    current_user_id = int(get_jwt_identity())  # Convert back to int
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or user.role not in ['admin', 'finance']:
         return {'error': 'Unauthorized'}, 401
@@ -431,15 +469,15 @@ def update_employee(employee_id):
             db.session.add(new_salary)
     
     db.session.commit()
+    invalidate_employee_facets()
     
     return {'message': 'Employee updated', 'employee': employee.to_dict()}, 200
 
 @employee_bp.route('/<int:employee_id>', methods=['DELETE'])
-@jwt_required()
+@auth_required()
 def delete_employee(employee_id):
     """Soft delete employee"""
-    current_user_id = int(get_jwt_identity())  # Convert back to int
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or user.role not in ['admin', 'finance']:
         return {'error': 'Unauthorized'}, 401
@@ -451,69 +489,40 @@ def delete_employee(employee_id):
     
     employee.is_active = False
     db.session.commit()
+    invalidate_employee_counts()
+    invalidate_employee_facets()
     
     return {'message': 'Employee deleted'}, 200
 
 @employee_bp.route('/options', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_employee_options():
     """Get options for employee form dropdowns and statistics"""
     try:
-        current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
+        user = g.current_user
         
         if not user or not user.can_manage_employees():
             return {'error': 'Unauthorized'}, 401
         
-        # Get unique departments
-        departments = db.session.query(Employee.department).filter(
-            Employee.department.isnot(None),
-            Employee.is_active == True
-        ).distinct().all()
-        
-        # Get unique employment types
-        employment_types = db.session.query(Employee.employment_type).filter(
-            Employee.employment_type.isnot(None),
-            Employee.is_active == True
-        ).distinct().all()
-        
-        # Get employee statistics
-        total_employees = Employee.query.filter_by(is_active=True).count()
-        
-        # Department distribution
-        dept_stats = db.session.query(
-            Employee.department, 
-            db.func.count(Employee.id).label('count')
-        ).filter_by(is_active=True).group_by(Employee.department).all()
-        
-        # Gender distribution
-        gender_stats = db.session.query(
-            Employee.gender,
-            db.func.count(Employee.id).label('count')
-        ).filter_by(is_active=True).group_by(Employee.gender).all()
-        
-        # Employment type distribution
-        employment_stats = db.session.query(
-            Employee.employment_type,
-            db.func.count(Employee.id).label('count')
-        ).filter_by(is_active=True).group_by(Employee.employment_type).all()
+        # Distinct values, totals and distributions from one facet scan
+        facets = EmployeeFacets.compute(Employee.is_active == True, {'is_active': True})
         
         return {
             'form_options': {
-                'departments': [d[0] for d in departments if d[0]],
-                'employment_types': [e[0] for e in employment_types if e[0]],
+                'departments': [d[0] for d in facets['department'] if d[0]],
+                'employment_types': [e[0] for e in facets['employment_type'] if e[0]],
                 'genders': ['Male', 'Female', 'Other', 'Prefer not to say'],
                 'marital_statuses': ['Single', 'Married', 'Divorced', 'Widowed', 'Separated'],
                 'employment_type_options': ['Full-time', 'Part-time', 'Contract', 'Temporary', 'Intern']
             },
             'statistics': {
-                'total_employees': total_employees,
-                'by_department': [{'department': d[0] or 'Unassigned', 'count': d[1]} for d in dept_stats],
-                'by_gender': [{'gender': g[0] or 'Not specified', 'count': g[1]} for g in gender_stats],
-                'by_employment_type': [{'type': e[0] or 'Not specified', 'count': e[1]} for e in employment_stats]
+                'total_employees': facets['total'],
+                'by_department': [{'department': d[0] or 'Unassigned', 'count': d[1]} for d in facets['department']],
+                'by_gender': [{'gender': g[0] or 'Not specified', 'count': g[1]} for g in facets['gender']],
+                'by_employment_type': [{'type': e[0] or 'Not specified', 'count': e[1]} for e in facets['employment_type']]
             }
         }, 200
         
     except Exception as e:
-        print(f"ERROR: Failed to get employee options: {e}")
+        logger.exception('Failed to get employee options')
         return {'error': f'Failed to fetch employee options: {str(e)}'}, 500
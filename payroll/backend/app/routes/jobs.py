@@ -0,0 +1,128 @@
+from flask import Blueprint, request, g
+from app.auth import auth_required
+from app.models import Job
+from app.replica import primary_only
+from app.services.job_service import JobService
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+# Job status, progress and results are written by the worker process, not by
+# the polling user, so the recent-writer pin cannot keep these reads fresh:
+# the read endpoints always use the primary (@primary_only)
+
+def submitted(job):
+    """202 response for a queued job, pointing at its status URL"""
+    return (
+        {'message': 'Job queued', 'job': job.to_dict()},
+        202,
+        {'Location': f'/api/jobs/{job.id}'}
+    )
+
+def _get_visible_job(user, job_id):
+    """Get a job the user may see: their own, or any job for admins"""
+    job = Job.query.get(job_id)
+    if job and (user.is_admin() or job.created_by == user.id):
+        return job
+    return None
+
+@jobs_bp.route('', methods=['POST'])
+@auth_required()
+def submit_job():
+    """Queue a background job"""
+    user = g.current_user
+    
+    if not user or not user.can_process_payroll():
+        return {'error': 'Unauthorized'}, 401
+    
+    data = request.get_json() or {}
+    job_type = data.get('type')
+    if not job_type:
+        return {'error': 'Missing job type'}, 400
+    
+    try:
+        job = JobService.submit(job_type, data.get('params'), user.id)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    return submitted(job)
+
+@jobs_bp.route('', methods=['GET'])
+@auth_required()
+@primary_only
+def get_jobs():
+    """List jobs, newest first (admins see every user's jobs)"""
+    user = g.current_user
+    if not user:
+        return {'error': 'Unauthorized'}, 401
+    
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    status = request.args.get('status')
+    job_type = request.args.get('type')
+    
+    query = Job.query
+    if not user.is_admin():
+        query = query.filter(Job.created_by == user.id)
+    if status:
+        query = query.filter(Job.status == status)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    
+    jobs = query.order_by(Job.id.desc()).paginate(page=page, per_page=per_page)
+    
+    return {
+        'jobs': [job.to_dict() for job in jobs.items],
+        'total': jobs.total,
+        'pages': jobs.pages,
+        'current_page': page
+    }, 200
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@auth_required()
+@primary_only
+def get_job(job_id):
+    """Get job status and progress"""
+    user = g.current_user
+    if not user:
+        return {'error': 'Unauthorized'}, 401
+    
+    job = _get_visible_job(user, job_id)
+    if not job:
+        return {'error': 'Job not found'}, 404
+    
+    return {'job': job.to_dict()}, 200
+
+@jobs_bp.route('/<int:job_id>/result', methods=['GET'])
+@auth_required()
+@primary_only
+def get_job_result(job_id):
+    """Get the result of a finished job"""
+    user = g.current_user
+    if not user:
+        return {'error': 'Unauthorized'}, 401
+    
+    job = _get_visible_job(user, job_id)
+    if not job:
+        return {'error': 'Job not found'}, 404
+    
+    if job.status != 'succeeded':
+        return {'error': f'Job is {job.status}', 'job': job.to_dict()}, 409
+    
+    return {'job': job.to_dict(), 'result': job.result}, 200
+
+@jobs_bp.route('/<int:job_id>/cancel', methods=['POST'])
+@auth_required()
+def cancel_job(job_id):
+    """Cancel a job that has not started yet"""
+    user = g.current_user
+    if not user:
+        return {'error': 'Unauthorized'}, 401
+    
+    job = _get_visible_job(user, job_id)
+    if not job:
+        return {'error': 'Job not found'}, 404
+    
+    if not JobService.cancel(job):
+        return {'error': f'Job is {job.status}', 'job': job.to_dict()}, 409
+    
+    return {'message': 'Job cancelled', 'job': job.to_dict()}, 200
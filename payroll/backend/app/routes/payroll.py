@@ -1,14 +1,34 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import json
+from flask import Blueprint, Response, request, jsonify, g
 from app import db
-from app.models import PayrollRun, User, Employee, Salary
+from app.auth import auth_required
+from app.cache import invalidate_payroll_period
+from app.export import EXPORT_FORMATS, export_response
+from app.pagination import wants_cursor, keyset_page, CursorError
+from app.routes.jobs import submitted
+from app.services.job_service import JobService
+from app.models import PayrollRun, Employee, Salary
 from datetime import date
-from sqlalchemy import extract
+from sqlalchemy import extract, select, update
+from sqlalchemy.orm import joinedload, selectinload
 
 payroll_bp = Blueprint('payroll', __name__, url_prefix='/api/payroll')
 
+# Employees serialized per chunk of the streamed payroll preview
+PREVIEW_STREAM_BATCH = 500
+
+def parse_period(data):
+    """Month and year of a request body as ints; raises ValueError with the client-facing message"""
+    try:
+        month, year = int(data.get('month')), int(data.get('year'))
+    except (TypeError, ValueError):
+        raise ValueError('month and year must be integers')
+    if not 1 <= month <= 12:
+        raise ValueError('month must be between 1 and 12')
+    return month, year
+
 @payroll_bp.route('/runs', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_payroll_runs():
     """Get payroll runs with optional filters"""
     page = request.args.get('page', 1, type=int)
@@ -17,7 +37,8 @@ def get_payroll_runs():
     year = request.args.get('year', type=int)
     employee_id = request.args.get('employee_id', type=int)
     
-    query = PayrollRun.query
+    # Employee names are serialized with each run
+    query = PayrollRun.query.options(joinedload(PayrollRun.employee))
     
     if month:
         query = query.filter(PayrollRun.month == month)
@@ -26,6 +47,29 @@ def get_payroll_runs():
     if employee_id:
         query = query.filter(PayrollRun.employee_id == employee_id)
     
+    # Opt-in keyset pagination on (year, month, id)
+    if wants_cursor(request.args):
+        try:
+            items, next_cursor = keyset_page(
+                query,
+                [PayrollRun.year, PayrollRun.month, PayrollRun.id],
+                'payroll_runs:period:desc',
+                cursor=request.args.get('cursor'),
+                limit=request.args.get('limit', per_page, type=int),
+                descending=True
+            )
+        except CursorError as e:
+            return {'error': str(e)}, 400
+        
+        response = {
+            'payroll_runs': [run.to_dict() for run in items],
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        }
+        if request.args.get('include_total', 'false').lower() in ('1', 'true'):
+            response['total'] = query.count()
+        return response, 200
+    
     runs = query.order_by(PayrollRun.year.desc(), PayrollRun.month.desc()).paginate(
         page=page, per_page=per_page
     )
@@ -37,38 +81,112 @@ def get_payroll_runs():
         'current_page': page
     }, 200
 
+@payroll_bp.route('/runs/export', methods=['GET'])
+@auth_required()
+def export_payroll_runs():
+    """Stream payroll runs with employee columns as CSV or NDJSON"""
+    user = g.current_user
+    
+    if not user or not user.can_process_payroll():
+        return {'error': 'Unauthorized'}, 401
+    
+    fmt = request.args.get('format', 'csv')
+    year = request.args.get('year', type=int)
+    month = request.args.get('month', type=int)
+    status = request.args.get('status')
+    
+    if fmt not in EXPORT_FORMATS:
+        return {'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, 400
+    
+    statement = select(
+        PayrollRun.id.label('payroll_run_id'),
+        PayrollRun.year,
+        PayrollRun.month,
+        Employee.employee_id.label('employee_number'),
+        Employee.name.label('employee_name'),
+        Employee.department,
+        PayrollRun.basic_salary,
+        PayrollRun.deductions,
+        PayrollRun.net_salary,
+        PayrollRun.status,
+        PayrollRun.created_at
+    ).join(Employee, Employee.id == PayrollRun.employee_id)
+    
+    if year:
+        statement = statement.where(PayrollRun.year == year)
+    if month:
+        statement = statement.where(PayrollRun.month == month)
+    if status:
+        statement = statement.where(PayrollRun.status == status)
+    
+    statement = statement.order_by(PayrollRun.year, PayrollRun.month, PayrollRun.id)
+    period = f"-{year}" + (f"-{month:02d}" if month else '') if year else ''
+    return export_response(statement, fmt, f'payroll-runs{period}')
+
 @payroll_bp.route('/employees', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_employees_for_payroll():
     """Get active employees for payroll creation"""
-    current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or not user.can_process_payroll():
         return {'error': 'Unauthorized'}, 401
     
-    employees = Employee.query.filter_by(is_active=True).order_by(Employee.name).all()
+    employees = Employee.query.filter_by(is_active=True).options(
+        selectinload(Employee.active_salaries)
+    ).order_by(Employee.name).all()
     
     # Include current salary for each employee
     result = []
     for emp in employees:
         emp_data = emp.to_dict()
-        # Get current salary
-        current_salary = Salary.query.filter(
-            Salary.employee_id == emp.id,
-            db.or_(Salary.end_date.is_(None), Salary.end_date >= date.today())
-        ).first()
-        emp_data['current_salary'] = float(current_salary.basic_salary) if current_salary else 0
+        emp_data['current_salary'] = emp_data['basic_salary'] or 0
         result.append(emp_data)
     
     return {'employees': result}, 200
 
+@payroll_bp.route('/preview', methods=['GET'])
+@auth_required()
+def preview_payroll():
+    """Dry-run a month's payroll: department totals plus a streamed per-employee breakdown"""
+    user = g.current_user
+    
+    if not user or not user.can_process_payroll():
+        return {'error': 'Unauthorized'}, 401
+    
+    month = request.args.get('month', type=int)
+    year = request.args.get('year', type=int)
+    department = request.args.get('department')
+    
+    if not month or not year:
+        return {'error': 'Missing month or year'}, 400
+    if not 1 <= month <= 12:
+        return {'error': 'month must be between 1 and 12'}, 400
+    
+    from app.services.payroll_service import PayrollService
+    
+    preview = PayrollService.preview_month(month, year, department)
+    employees = preview.pop('employees')
+    
+    def generate():
+        # Everything but the employee list up front, then employees in batches
+        head = json.dumps(preview)
+        yield head[:-1] + ', "employees": ['
+        batch = []
+        for i, row in enumerate(employees):
+            batch.append(('' if i == 0 else ',') + json.dumps(row))
+            if len(batch) == PREVIEW_STREAM_BATCH:
+                yield ''.join(batch)
+                batch = []
+        yield ''.join(batch) + ']}'
+    
+    return Response(generate(), mimetype='application/json')
+
 @payroll_bp.route('/runs', methods=['POST'])
-@jwt_required()
+@auth_required()
 def create_payroll_run():
     """Create new payroll run for a specific employee"""
-    current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or not user.can_process_payroll():
         return {'error': 'Unauthorized'}, 401
@@ -115,7 +233,7 @@ def create_payroll_run():
         basic_salary=basic_salary,
         deductions=deductions,
         net_salary=net_salary,
-        created_by=current_user_id
+        created_by=user.id
     )
     
     db.session.add(payroll_run)
@@ -124,90 +242,56 @@ def create_payroll_run():
     return {'message': 'Payroll run created', 'payroll_run': payroll_run.to_dict()}, 201
 
 @payroll_bp.route('/runs/bulk', methods=['POST'])
-@jwt_required()
+@auth_required()
 def create_bulk_payroll_runs():
     """Create payroll runs for all employees for a specific month/year"""
-    current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or not user.can_process_payroll():
         return {'error': 'Unauthorized'}, 401
     
-    data = request.get_json()
-    month = data.get('month')
-    year = data.get('year')
-    default_deductions = float(data.get('default_deductions', 0))
+    data = request.get_json() or {}
     
-    if not month or not year:
+    if not data.get('month') or not data.get('year'):
         return {'error': 'Missing month or year'}, 400
     
-    # Get all active employees
-    employees = Employee.query.filter_by(is_active=True).all()
+    try:
+        month, year = parse_period(data)
+    except ValueError as e:
+        return {'error': str(e)}, 400
     
-    success_count = 0
-    error_count = 0
-    errors = []
+    try:
+        default_deductions = float(data.get('default_deductions', 0))
+    except (TypeError, ValueError):
+        return {'error': 'default_deductions must be a number'}, 400
     
-    for employee in employees:
+    # Large organisations can queue the work instead of holding the request open
+    if data.get('async'):
         try:
-            # Check if payroll run already exists for this employee/month/year
-            existing = PayrollRun.query.filter_by(
-                employee_id=employee.id, 
-                month=month, 
-                year=year
-            ).first()
-            if existing:
-                continue  # Skip if already exists
-            
-            # Get current salary
-            current_salary = Salary.query.filter(
-                Salary.employee_id == employee.id,
-                db.or_(Salary.end_date.is_(None), Salary.end_date >= date.today())
-            ).first()
-            
-            if not current_salary:
-                errors.append(f"No salary found for {employee.name}")
-                error_count += 1
-                continue
-            
-            basic_salary = current_salary.basic_salary
-            net_salary = basic_salary - default_deductions
-            
-            payroll_run = PayrollRun(
-                employee_id=employee.id,
-                month=month,
-                year=year,
-                basic_salary=basic_salary,
-                deductions=default_deductions,
-                net_salary=net_salary,
-                created_by=current_user_id
-            )
-            
-            db.session.add(payroll_run)
-            success_count += 1
-            
-        except Exception as e:
-            errors.append(f"Error for {employee.name}: {str(e)}")
-            error_count += 1
+            return submitted(JobService.submit('payroll.create_runs', data, user.id))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+    
+    from app.services.payroll_service import PayrollService
     
     try:
+        result = PayrollService.create_bulk_payroll_runs(
+            month, year, default_deductions, user.id
+        )
         db.session.commit()
         return {
-            'message': f'Created {success_count} payroll runs',
-            'success_count': success_count,
-            'error_count': error_count,
-            'errors': errors
+            'message': f"Created {result['success_count']} payroll runs",
+            **result
         }, 201
     except Exception as e:
         db.session.rollback()
         return {'error': f'Database error: {str(e)}'}, 500
 
 @payroll_bp.route('/runs/<int:payroll_run_id>/process', methods=['POST'])
-@jwt_required()
+@auth_required()
 def process_payroll(payroll_run_id):
     """Mark payroll run as processed and generate payslip"""
-    current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or not user.can_process_payroll():
         return {'error': 'Unauthorized'}, 401
@@ -223,49 +307,40 @@ def process_payroll(payroll_run_id):
     try:
         # Import here to avoid circular imports
         from app.services.payroll_service import PayrollService
+        from app.services.analytics_service import AnalyticsService
         from app.models import Payslip, PayslipDetail, Allowance, Deduction
         
-        # Use the salary already stored in the payroll run instead of recalculating
-        basic_salary = payroll_run.basic_salary
+        # Claim the run first so a concurrent month-wide process skips it
+        claimed = db.session.execute(
+            update(PayrollRun)
+            .where(PayrollRun.id == payroll_run_id, PayrollRun.status == 'draft')
+            .values(status='processed'),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return {'error': 'Payroll run is not in draft status'}, 400
+        
+        # Period window for allowances and deductions
+        period_start = date(payroll_run.year, payroll_run.month, 1)
+        period_end = date(payroll_run.year, payroll_run.month, 28)
         
-        # Calculate allowances for the payroll period
         allowances = Allowance.query.filter(
             Allowance.employee_id == payroll_run.employee_id,
-            Allowance.start_date <= date(payroll_run.year, payroll_run.month, 28),
-            db.or_(Allowance.end_date.is_(None), Allowance.end_date >= date(payroll_run.year, payroll_run.month, 1))
-        ).all()
+            Allowance.start_date <= period_end,
+            db.or_(Allowance.end_date.is_(None), Allowance.end_date >= period_start)
+        ).order_by(Allowance.id).all()
         
-        total_allowances = sum(a.amount for a in allowances)
-        
-        # Calculate deductions for the payroll period
         deductions_records = Deduction.query.filter(
             Deduction.employee_id == payroll_run.employee_id,
-            Deduction.start_date <= date(payroll_run.year, payroll_run.month, 28),
-            db.or_(Deduction.end_date.is_(None), Deduction.end_date >= date(payroll_run.year, payroll_run.month, 1))
-        ).all()
-        
-        total_deductions = sum(d.amount for d in deductions_records) + payroll_run.deductions
-        
-        # Calculate gross salary
-        gross_salary = basic_salary + total_allowances
-        
-        # Calculate tax
-        tax = PayrollService._calculate_tax(gross_salary)
-        
-        # Calculate net salary
-        net_salary = gross_salary - total_deductions - tax
+            Deduction.start_date <= period_end,
+            db.or_(Deduction.end_date.is_(None), Deduction.end_date >= period_start)
+        ).order_by(Deduction.id).all()
         
-        # Prepare payroll calculation data
-        payroll_calc = {
-            'basic_salary': basic_salary,
-            'total_allowances': total_allowances,
-            'total_deductions': total_deductions,
-            'gross_salary': gross_salary,
-            'tax': tax,
-            'net_salary': net_salary,
-            'allowances_detail': [{'type': a.allowance_type, 'amount': a.amount} for a in allowances],
-            'deductions_detail': [{'type': d.deduction_type, 'amount': d.amount} for d in deductions_records]
-        }
+        # Use the salary already stored in the payroll run instead of recalculating
+        payroll_calc = PayrollService.calculate_run_payslip(
+            payroll_run.basic_salary, payroll_run.deductions, allowances, deductions_records
+        )
         
         # Check if payslip already exists
         existing_payslip = Payslip.query.filter_by(payroll_run_id=payroll_run_id).first()
@@ -284,56 +359,93 @@ def process_payroll(payroll_run_id):
             db.session.add(payslip)
             db.session.flush()  # To get payslip ID
             
-            # Create payslip details for allowances
-            for allowance in payroll_calc['allowances_detail']:
-                detail = PayslipDetail(
-                    payslip_id=payslip.id,
-                    detail_type='allowance',
-                    description=allowance['type'],
-                    amount=allowance['amount']
-                )
-                db.session.add(detail)
-            
-            # Create payslip details for deductions
-            for deduction in payroll_calc['deductions_detail']:
-                detail = PayslipDetail(
-                    payslip_id=payslip.id,
-                    detail_type='deduction',
-                    description=deduction['type'],
-                    amount=deduction['amount']
-                )
-                db.session.add(detail)
+            # Create payslip details for allowances, deductions and tax
+            for detail in PayrollService.payslip_detail_rows(payslip.id, payroll_calc):
+                db.session.add(PayslipDetail(**detail))
             
-            # Add tax detail if applicable
-            if payroll_calc['tax'] > 0:
-                tax_detail = PayslipDetail(
-                    payslip_id=payslip.id,
-                    detail_type='deduction',
-                    description='Income Tax',
-                    amount=payroll_calc['tax']
-                )
-                db.session.add(tax_detail)
+            # Keep the analytics rollup in step with the new payslip
+            AnalyticsService.apply_payslips([dict(
+                payroll_calc,
+                year=payroll_run.year,
+                month=payroll_run.month,
+                department=payroll_run.employee.department
+            )])
         
-        # Mark payroll as processed
+        # Already marked processed by the claim; keep the loaded object in step
         payroll_run.status = 'processed'
         
         db.session.commit()
+        invalidate_payroll_period(payroll_run.year, payroll_run.month)
         
         return {
             'message': 'Payroll processed and payslip generated',
             'payroll_run': payroll_run.to_dict()
         }, 200
-        
+    
+    except Exception as e:
+        db.session.rollback()
+        return {'error': f'Failed to process payroll: {str(e)}'}, 500
+
+@payroll_bp.route('/runs/process', methods=['POST'])
+@auth_required()
+def process_payroll_month():
+    """Process every draft payroll run for a month and generate all payslips"""
+    user = g.current_user
+    
+    if not user or not user.can_process_payroll():
+        return {'error': 'Unauthorized'}, 401
+    
+    data = request.get_json() or {}
+    department = data.get('department')
+    run_ids = data.get('run_ids')
+    
+    if not data.get('month') or not data.get('year'):
+        return {'error': 'Missing month or year'}, 400
+    
+    try:
+        month, year = parse_period(data)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    try:
+        chunk_size = int(data.get('chunk_size', 500))
+    except (TypeError, ValueError):
+        return {'error': 'chunk_size must be an integer'}, 400
+    
+    if run_ids is not None and not isinstance(run_ids, list):
+        return {'error': 'run_ids must be a list'}, 400
+    
+    if chunk_size < 1:
+        return {'error': 'chunk_size must be positive'}, 400
+    
+    if data.get('async'):
+        try:
+            return submitted(JobService.submit('payroll.process_month', data, user.id))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+    
+    from app.services.payroll_service import PayrollService
+    
+    try:
+        draft_run_ids = PayrollService.find_draft_runs(month, year, department, run_ids)
+        try:
+            result = PayrollService.process_payroll_runs(month, year, draft_run_ids, chunk_size)
+        finally:
+            # Earlier chunks may have committed even if a later one failed
+            invalidate_payroll_period(year, month)
+        return {
+            'message': f"Processed {result['processed_count']} payroll runs",
+            **result
+        }, 200
     except Exception as e:
         db.session.rollback()
         return {'error': f'Failed to process payroll: {str(e)}'}, 500
 
 @payroll_bp.route('/runs/<int:payroll_run_id>', methods=['PUT'])
-@jwt_required()
+@auth_required()
 def update_payroll_run(payroll_run_id):
     """Update payroll run deductions"""
-    current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = g.current_user
     
     if not user or not user.can_process_payroll():
         return {'error': 'Unauthorized'}, 401
@@ -1,32 +1,40 @@
-from flask import Blueprint, request, jsonify, send_file
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import itertools
+from flask import Blueprint, Response, request, jsonify, send_file, make_response, stream_with_context, g
 from app import db
-from app.models import Payslip, User, Employee
-from app.services import PDFService
+from app.auth import auth_required
+from app.export import EXPORT_FORMATS, export_response
+from app.models import Payslip, PayrollRun, Employee
+from app.services import PDFService, PDFCache
+from app.pagination import wants_cursor, keyset_page, CursorError
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from io import BytesIO
 
 payslip_bp = Blueprint('payslips', __name__, url_prefix='/api/payslips')
 
 @payslip_bp.route('', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_payslips():
     """Get payslips with filters"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = g.current_user
+    if not user:
+        return {'error': 'Unauthorized'}, 401
     
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     employee_id = request.args.get('employee_id', type=int)
     payroll_run_id = request.args.get('payroll_run_id', type=int)
     
-    query = Payslip.query
+    query = Payslip.query.options(
+        joinedload(Payslip.employee),
+        joinedload(Payslip.payroll_run)
+    )
     
     # Employees can only see their own payslips
     if user.role == 'employee':
-        employee = Employee.query.filter_by(user_id=user.id).first()
-        if not employee:
+        if not user.employee_id:
             return {'error': 'Employee record not found'}, 404
-        query = query.filter_by(employee_id=employee.id)
+        query = query.filter_by(employee_id=user.employee_id)
     else:
         if employee_id:
             query = query.filter_by(employee_id=employee_id)
@@ -34,34 +42,157 @@ def get_payslips():
     if payroll_run_id:
         query = query.filter_by(payroll_run_id=payroll_run_id)
     
-    payslips = query.order_by(Payslip.created_at.desc()).paginate(page=page, per_page=per_page)
+    # Opt-in keyset pagination, newest first. created_at is nullable, so the
+    # seek runs on the primary key alone (ids follow insertion order)
+    if wants_cursor(request.args):
+        try:
+            items, next_cursor = keyset_page(
+                query,
+                [Payslip.id],
+                'payslips:id:desc',
+                cursor=request.args.get('cursor'),
+                limit=request.args.get('limit', per_page, type=int),
+                descending=True
+            )
+        except CursorError as e:
+            return {'error': str(e)}, 400
+        
+        response = {
+            'payslips': [_payslip_with_context(p) for p in items],
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        }
+        if request.args.get('include_total', 'false').lower() in ('1', 'true'):
+            response['total'] = query.count()
+        return response, 200
     
-    # Include employee information in response
-    result = []
-    for payslip in payslips.items:
-        payslip_data = payslip.to_dict()
-        if payslip.employee:
-            payslip_data['employee_name'] = payslip.employee.name
-            payslip_data['employee_id_number'] = payslip.employee.employee_id
-            payslip_data['department'] = payslip.employee.department
-        if payslip.payroll_run:
-            payslip_data['month'] = payslip.payroll_run.month
-            payslip_data['year'] = payslip.payroll_run.year
-        result.append(payslip_data)
+    payslips = query.order_by(Payslip.created_at.desc()).paginate(page=page, per_page=per_page)
     
     return {
-        'payslips': result,
+        'payslips': [_payslip_with_context(p) for p in payslips.items],
         'total': payslips.total,
         'pages': payslips.pages,
         'current_page': page
     }, 200
 
+@payslip_bp.route('/export', methods=['GET'])
+@auth_required()
+def export_payslips():
+    """Stream payslips with employee and period columns as CSV or NDJSON"""
+    user = g.current_user
+    if not user:
+        return {'error': 'Unauthorized'}, 401
+    
+    fmt = request.args.get('format', 'csv')
+    year = request.args.get('year', type=int)
+    month = request.args.get('month', type=int)
+    employee_id = request.args.get('employee_id', type=int)
+    department = request.args.get('department')
+    
+    if fmt not in EXPORT_FORMATS:
+        return {'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, 400
+    
+    statement = select(
+        Payslip.id.label('payslip_id'),
+        PayrollRun.year,
+        PayrollRun.month,
+        Employee.employee_id.label('employee_number'),
+        Employee.name.label('employee_name'),
+        Employee.department,
+        Payslip.basic_salary,
+        Payslip.total_allowances,
+        Payslip.total_deductions,
+        Payslip.gross_salary,
+        Payslip.tax,
+        Payslip.net_salary,
+        Payslip.payment_status,
+        Payslip.payment_date,
+        Payslip.created_at
+    ).join(
+        Employee, Employee.id == Payslip.employee_id
+    ).join(
+        PayrollRun, PayrollRun.id == Payslip.payroll_run_id
+    )
+    
+    # Employees can only export their own payslips
+    if user.role == 'employee':
+        if not user.employee_id:
+            return {'error': 'Employee record not found'}, 404
+        statement = statement.where(Payslip.employee_id == user.employee_id)
+    elif employee_id:
+        statement = statement.where(Payslip.employee_id == employee_id)
+    
+    if year:
+        statement = statement.where(PayrollRun.year == year)
+    if month:
+        statement = statement.where(PayrollRun.month == month)
+    if department:
+        statement = statement.where(Employee.department == department)
+    
+    statement = statement.order_by(PayrollRun.year, PayrollRun.month, Payslip.id)
+    period = f"-{year}" + (f"-{month:02d}" if month else '') if year else ''
+    return export_response(statement, fmt, f'payslips{period}')
+
+@payslip_bp.route('/archive', methods=['GET'])
+@auth_required()
+def download_payslip_archive():
+    """Stream a ZIP of payslip PDFs for a year or month, optionally one department"""
+    user = g.current_user
+    if not user:
+        return {'error': 'Unauthorized'}, 401
+    
+    year = request.args.get('year', type=int)
+    month = request.args.get('month', type=int)
+    department = request.args.get('department')
+    
+    if not year:
+        return {'error': 'Missing year'}, 400
+    
+    # Employees can only download their own payslips
+    employee_id = None
+    if user.role == 'employee':
+        if not user.employee_id:
+            return {'error': 'Employee record not found'}, 404
+        employee_id = user.employee_id
+    
+    payslips = PDFService.iter_payslip_data(
+        month, year, department=department, employee_id=employee_id
+    )
+    # Fail with a normal error response if there is nothing to archive
+    first = next(payslips, None)
+    if first is None:
+        return {'error': 'No payslips found'}, 404
+    
+    period = f'{year}-{month:02d}' if month else str(year)
+    name = f"payslips_{period}{'_' + department if department else ''}"
+    return Response(
+        stream_with_context(PDFCache.iter_zip(itertools.chain([first], payslips), folder=name)),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename="{name}.zip"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+def _payslip_with_context(payslip):
+    """Serialize a payslip with employee and period information"""
+    payslip_data = payslip.to_dict()
+    if payslip.employee:
+        payslip_data['employee_name'] = payslip.employee.name
+        payslip_data['employee_id_number'] = payslip.employee.employee_id
+        payslip_data['department'] = payslip.employee.department
+    if payslip.payroll_run:
+        payslip_data['month'] = payslip.payroll_run.month
+        payslip_data['year'] = payslip.payroll_run.year
+    return payslip_data
+
 @payslip_bp.route('/<int:payslip_id>', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_payslip(payslip_id):
     """Get payslip details"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = g.current_user
+    if not user:
+        return {'error': 'Unauthorized'}, 401
     
     payslip = Payslip.query.get(payslip_id)
     
@@ -69,10 +200,8 @@ def get_payslip(payslip_id):
         return {'error': 'Payslip not found'}, 404
     
     # Check access control
-    if user.role == 'employee':
-        employee = Employee.query.filter_by(user_id=user.id).first()
-        if not employee or employee.id != payslip.employee_id:
-            return {'error': 'Unauthorized'}, 401
+    if user.role == 'employee' and user.employee_id != payslip.employee_id:
+        return {'error': 'Unauthorized'}, 401
     
     data = payslip.to_dict()
     data['details'] = [d.to_dict() for d in payslip.details]
@@ -81,11 +210,12 @@ def get_payslip(payslip_id):
     return data, 200
 
 @payslip_bp.route('/<int:payslip_id>/pdf', methods=['GET'])
-@jwt_required()
+@auth_required()
 def download_payslip_pdf(payslip_id):
     """Download payslip as PDF"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = g.current_user
+    if not user:
+        return {'error': 'Unauthorized'}, 401
     
     payslip = Payslip.query.get(payslip_id)
     
@@ -93,19 +223,25 @@ def download_payslip_pdf(payslip_id):
         return {'error': 'Payslip not found'}, 404
     
     # Check access control
-    if user.role == 'employee':
-        employee = Employee.query.filter_by(user_id=user.id).first()
-        if not employee or employee.id != payslip.employee_id:
-            return {'error': 'Unauthorized'}, 401
+    if user.role == 'employee' and user.employee_id != payslip.employee_id:
+        return {'error': 'Unauthorized'}, 401
     
     employee = payslip.employee
     payroll_run = payslip.payroll_run
     
-    pdf_buffer = PDFService.generate_payslip_pdf(payslip, employee, payroll_run)
+    # Rendered PDFs are cached on disk, keyed by payslip content and template version
+    data = PDFService.serialize_payslip(payslip, employee, payroll_run)
+    cache_key = PDFCache.cache_key(data)
+    
+    if cache_key in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(cache_key)
+        return response
     
     return send_file(
-        pdf_buffer,
+        PDFCache.get_or_render(data, cache_key),
         mimetype='application/pdf',
         as_attachment=True,
-        download_name=f'payslip_{employee.employee_id}_{payroll_run.year}_{payroll_run.month}.pdf'
+        download_name=PDFService.payslip_filename(data),
+        etag=cache_key
     )
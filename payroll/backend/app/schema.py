@@ -0,0 +1,69 @@
+"""Database schema version check
+
+The schema is managed by the SQL scripts in ``scripts/``; each records its
+number in the schema_migrations table. Startup compares the highest recorded
+version with SCHEMA_VERSION (one indexed MAX query) instead of running
+``db.create_all()``, which reflects every table on every boot.
+"""
+import logging
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+from app import db
+from app.models import SchemaMigration
+
+logger = logging.getLogger(__name__)
+
+# Number of the newest scripts/NNN_*.sql migration this code expects
+SCHEMA_VERSION = 10
+
+def current_version():
+    """Highest applied migration, 0 if none are recorded, or None if the table is missing"""
+    try:
+        return db.session.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+    except DBAPIError:
+        db.session.rollback()
+        return None
+    finally:
+        # Leave the checked-out connection to the pool before workers fork
+        db.session.remove()
+
+def check_schema(strict=False):
+    """Log (or with ``strict`` raise RuntimeError) when the database schema is missing or behind
+    
+    Returns the applied version as from current_version().
+    """
+    version = current_version()
+    if version is None:
+        problem = 'schema_migrations table not found; apply scripts/009_add_schema_migrations.sql ' \
+                  'or run flask schema init on an empty database'
+    elif version < SCHEMA_VERSION:
+        problem = f'database schema is at version {version}, expected {SCHEMA_VERSION}; ' \
+                  f'apply scripts {version + 1:03d}-{SCHEMA_VERSION:03d}'
+    else:
+        if version > SCHEMA_VERSION:
+            # Expected mid-deploy, when migrations run ahead of the new code
+            logger.warning('Database schema is at version %s, newer than this code (%s)',
+                           version, SCHEMA_VERSION)
+        else:
+            logger.info('Database schema is at version %s', version)
+        return version
+    
+    if strict:
+        raise RuntimeError(problem)
+    logger.warning(problem)
+    return version
+
+def init_schema():
+    """Create all tables from the models and mark every migration as applied
+    
+    For fresh development and test databases only; production databases are
+    built from the SQL scripts.
+    """
+    db.create_all()
+    applied = set(db.session.scalars(select(SchemaMigration.version)))
+    db.session.add_all(
+        SchemaMigration(version=version) for version in range(1, SCHEMA_VERSION + 1)
+        if version not in applied
+    )
+    db.session.commit()
+    return SCHEMA_VERSION
@@ -1,4 +1,32 @@
-from .payroll_service import PayrollService
-from .pdf_service import PDFService
+"""Service layer
 
-__all__ = ['PayrollService', 'PDFService']
+Services are imported on first use rather than with the package, so that
+importing one service (or starting a process that needs none, like the job
+worker's CLI or a route that only reads) does not load NumPy and ReportLab.
+"""
+import importlib
+
+# Public name -> module that defines it
+_SERVICES = {
+    'PayrollService': '.payroll_service',
+    'PDFService': '.pdf_service',
+    'PDFCache': '.pdf_cache',
+    'AnalyticsService': '.analytics_service',
+    'EmployeeSearch': '.search_service',
+    'EmployeeFacets': '.facet_service',
+    'SeedService': '.seed_service',
+    'JobService': '.job_service'
+}
+
+__all__ = list(_SERVICES)
+
+def __getattr__(name):
+    module = _SERVICES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
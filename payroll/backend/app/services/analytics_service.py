@@ -0,0 +1,105 @@
+from sqlalchemy import func, insert, delete
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from app import db
+from app.models import Payslip, PayrollRun, Employee, PayrollRollup
+
+# Dialect INSERT constructs that support an upsert clause
+_UPSERT_INSERTS = {
+    'mysql': mysql.insert,
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert
+}
+
+# Rollup columns that payslip deltas are added to
+_ROLLUP_TOTALS = ('payslip_count', 'total_gross', 'total_tax', 'total_deductions', 'total_net')
+
+class AnalyticsService:
+    """Service maintaining the payroll_rollups table behind the analytics endpoints
+
+    Rows are keyed by (year, month, department) using the employee's department
+    when the payslip was recorded; rebuild_rollup() re-derives everything from
+    payslips using current departments.
+    """
+    
+    @staticmethod
+    def apply_payslips(payslips):
+        """Add payslip figures to the rollup within the caller's transaction
+
+        ``payslips`` is an iterable of dicts with year, month, department,
+        gross_salary, tax, total_deductions and net_salary. Deltas are folded
+        per key first and written with one upsert (ON DUPLICATE KEY UPDATE on
+        MySQL, ON CONFLICT DO UPDATE on SQLite and PostgreSQL), so concurrent
+        chunks that create the same period/department add to one row instead
+        of racing to insert it.
+        """
+        deltas = {}
+        for p in payslips:
+            key = (p['year'], p['month'], p['department'] or '')
+            delta = deltas.setdefault(key, [0, 0.0, 0.0, 0.0, 0.0])
+            delta[0] += 1
+            delta[1] += p['gross_salary']
+            delta[2] += p['tax']
+            delta[3] += p['total_deductions']
+            delta[4] += p['net_salary']
+        
+        if not deltas:
+            return
+        
+        dialect = db.engine.dialect.name
+        stmt = _UPSERT_INSERTS[dialect](PayrollRollup).values([
+            {
+                'year': year,
+                'month': month,
+                'department': department,
+                'payslip_count': count,
+                'total_gross': gross,
+                'total_tax': tax,
+                'total_deductions': deductions,
+                'total_net': net
+            }
+            for (year, month, department), (count, gross, tax, deductions, net) in deltas.items()
+        ])
+        new = stmt.inserted if dialect == 'mysql' else stmt.excluded
+        totals = {
+            column: getattr(PayrollRollup, column) + getattr(new, column)
+            for column in _ROLLUP_TOTALS
+        }
+        # Column onupdate defaults do not apply to the conflict branch
+        totals['updated_at'] = func.current_timestamp()
+        if dialect == 'mysql':
+            stmt = stmt.on_duplicate_key_update(**totals)
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['year', 'month', 'department'], set_=totals
+            )
+        db.session.execute(stmt)
+    
+    @staticmethod
+    def rebuild_rollup():
+        """Recompute the whole rollup table from payslips; returns the number of rollup rows"""
+        department = func.coalesce(Employee.department, '')
+        source = db.session.query(
+            PayrollRun.year,
+            PayrollRun.month,
+            department,
+            func.count(Payslip.id),
+            func.coalesce(func.sum(Payslip.gross_salary), 0),
+            func.coalesce(func.sum(Payslip.tax), 0),
+            func.coalesce(func.sum(Payslip.total_deductions), 0),
+            func.coalesce(func.sum(Payslip.net_salary), 0)
+        ).select_from(Payslip).join(
+            PayrollRun, PayrollRun.id == Payslip.payroll_run_id
+        ).join(
+            Employee, Employee.id == Payslip.employee_id
+        ).group_by(PayrollRun.year, PayrollRun.month, department)
+        
+        db.session.execute(delete(PayrollRollup))
+        db.session.execute(
+            insert(PayrollRollup).from_select(
+                ['year', 'month', 'department', 'payslip_count',
+                 'total_gross', 'total_tax', 'total_deductions', 'total_net'],
+                source.statement
+            )
+        )
+        db.session.commit()
+        return PayrollRollup.query.count()
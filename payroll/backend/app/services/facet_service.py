@@ -0,0 +1,81 @@
+from sqlalchemy import func, tuple_
+from app import db
+from app.cache import facet_cache
+from app.models import Employee
+
+# Employee columns that can be faceted
+FACET_COLUMNS = {
+    'department': Employee.department,
+    'employment_type': Employee.employment_type,
+    'gender': Employee.gender
+}
+
+class EmployeeFacets:
+    """Facet counts for employee listings, computed in a single scan
+
+    PostgreSQL gets one GROUPING SETS query. MySQL and SQLite group by all
+    requested facet columns at once and fold the combinations in Python,
+    which is still one pass over the filtered rows. With a shared cache
+    backend, results are cached per filter signature and dropped whenever
+    employee data changes; a per-process cache would keep serving old totals
+    in the processes that did not make the change, so counts are exact then.
+    """
+    
+    @staticmethod
+    def compute(criterion, signature, facets=tuple(FACET_COLUMNS)):
+        """Return {'total': n, <facet>: [[value, count], ...]} for employees matching criterion
+
+        ``signature`` must identify the filters behind ``criterion`` (it is the
+        cache key); pass None to bypass the cache.
+        """
+        facets = list(facets)
+        if signature is None or not facet_cache.shared:
+            return EmployeeFacets._scan(criterion, facets)
+        return facet_cache.get_or_set(
+            'employees',
+            {'filters': signature, 'facets': facets},
+            ['employees'],
+            lambda: EmployeeFacets._scan(criterion, facets)
+        )
+    
+    @staticmethod
+    def _scan(criterion, facets):
+        columns = [FACET_COLUMNS[f] for f in facets]
+        query = db.session.query(Employee)
+        if criterion is not None:
+            query = query.filter(criterion)
+        
+        counts = {f: {} for f in facets}
+        total = 0
+        
+        if db.engine.dialect.name == 'postgresql':
+            rows = query.with_entities(
+                *columns,
+                *[func.grouping(c) for c in columns],
+                func.count(Employee.id)
+            ).group_by(
+                func.grouping_sets(*[tuple_(c) for c in columns], tuple_())
+            ).all()
+            for row in rows:
+                values, flags, count = row[:len(columns)], row[len(columns):-1], row[-1]
+                if all(flags):
+                    total = count  # grand total set
+                    continue
+                i = list(flags).index(0)
+                counts[facets[i]][values[i]] = count
+        else:
+            rows = query.with_entities(*columns, func.count(Employee.id)).group_by(*columns).all()
+            for row in rows:
+                count = row[-1]
+                total += count
+                for facet, value in zip(facets, row[:-1]):
+                    counts[facet][value] = counts[facet].get(value, 0) + count
+        
+        result = {'total': total}
+        for facet in facets:
+            # None sorts first, then values alphabetically
+            result[facet] = sorted(
+                ([value, count] for value, count in counts[facet].items()),
+                key=lambda item: (item[0] is not None, item[0] or '')
+            )
+        return result
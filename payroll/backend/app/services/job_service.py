@@ -0,0 +1,289 @@
+import logging
+import os
+import socket
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from app import db
+from app.cache import invalidate_payroll_period
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+# A job type: handler(params, progress, created_by) -> result dict, and
+# validate(params) -> cleaned params (raises ValueError on bad input)
+JobType = namedtuple('JobType', ['handler', 'validate'])
+
+JOB_TYPES = {}
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+def job_type(name, validate):
+    """Register a function as the handler of a job type"""
+    def decorator(fn):
+        JOB_TYPES[name] = JobType(fn, validate)
+        return fn
+    return decorator
+
+class JobProgress:
+    """Progress callback handed to job handlers
+    
+    ``progress(current, total)`` records progress and a heartbeat on the job
+    row and commits, so it also commits whatever the handler has pending.
+    Writes are throttled to one per ``min_interval`` seconds, except the last.
+    """
+    
+    def __init__(self, job_id, min_interval=1.0):
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._last = None
+    
+    def __call__(self, current, total=None):
+        now = time.monotonic()
+        finished = total is not None and current >= total
+        if self._last is not None and now - self._last < self.min_interval and not finished:
+            return
+        self._last = now
+        values = {'progress_current': current, 'heartbeat_at': datetime.now()}
+        if total is not None:
+            values['progress_total'] = total
+        db.session.execute(update(Job).where(Job.id == self.job_id).values(**values))
+        db.session.commit()
+
+class JobService:
+    """Database-backed job queue for long-running payroll operations
+    
+    Jobs are rows in the jobs table; ``flask jobs worker`` claims queued jobs
+    with a conditional UPDATE (so several workers can share the table without
+    a broker), runs the registered handler and stores its result or error.
+    """
+    
+    @staticmethod
+    def submit(job_type_name, params, created_by):
+        """Validate params and queue a job; raises ValueError for unknown types or bad params"""
+        spec = JOB_TYPES.get(job_type_name)
+        if spec is None:
+            raise ValueError(f'Unknown job type: {job_type_name}')
+        if params is not None and not isinstance(params, dict):
+            raise ValueError('params must be an object')
+        job = Job(job_type=job_type_name, params=spec.validate(params or {}), created_by=created_by)
+        db.session.add(job)
+        db.session.commit()
+        logger.info('Queued job %s (%s)', job.id, job.job_type)
+        return job
+    
+    @staticmethod
+    def cancel(job):
+        """Cancel a job that no worker has claimed yet; returns whether it was cancelled"""
+        cancelled = db.session.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == 'queued')
+            .values(status='cancelled', finished_at=datetime.now()),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        db.session.commit()
+        db.session.refresh(job)
+        return bool(cancelled)
+    
+    @staticmethod
+    def claim_next(worker_id):
+        """Atomically move the oldest queued job to running for this worker (None if idle)"""
+        candidates = [
+            row.id for row in db.session.query(Job.id).filter(
+                Job.status == 'queued'
+            ).order_by(Job.id).limit(10)
+        ]
+        for job_id in candidates:
+            now = datetime.now()
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == 'queued')
+                .values(
+                    status='running', worker=worker_id, attempts=Job.attempts + 1,
+                    started_at=now, heartbeat_at=now, error=None
+                ),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return db.session.get(Job, job_id)
+        return None
+    
+    @staticmethod
+    def execute(job):
+        """Run a claimed job's handler and record its result or error"""
+        job_id, name = job.id, job.job_type
+        spec = JOB_TYPES.get(name)
+        started = time.perf_counter()
+        try:
+            if spec is None:
+                raise ValueError(f'Unknown job type: {name}')
+            result = spec.handler(job.params, JobProgress(job_id), job.created_by)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Job %s (%s) failed', job_id, name)
+            values = {'status': 'failed', 'error': str(e) or e.__class__.__name__}
+        else:
+            values = {'status': 'succeeded', 'result': result}
+        
+        values['finished_at'] = datetime.now()
+        db.session.execute(
+            update(Job).where(Job.id == job_id).values(**values),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        logger.info('Job %s (%s) %s in %.1fs', job_id, name, values['status'],
+                    time.perf_counter() - started)
+        return values['status']
+    
+    @staticmethod
+    def requeue_stale(stale_seconds=None, max_attempts=None):
+        """Requeue running jobs whose worker stopped sending heartbeats
+        
+        A job that has already used up JOB_MAX_ATTEMPTS is failed instead.
+        Returns the number of jobs requeued or failed.
+        """
+        stale_seconds = stale_seconds or current_app.config.get('JOB_STALE_SECONDS', 600)
+        max_attempts = max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 3)
+        cutoff = datetime.now() - timedelta(seconds=stale_seconds)
+        stale = (Job.status == 'running', Job.heartbeat_at < cutoff)
+        
+        failed = db.session.execute(
+            update(Job)
+            .where(*stale, Job.attempts >= max_attempts)
+            .values(status='failed', error='Worker stopped responding', finished_at=datetime.now()),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        requeued = db.session.execute(
+            update(Job)
+            .where(*stale, Job.attempts < max_attempts)
+            .values(status='queued', worker=None),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        db.session.commit()
+        if failed or requeued:
+            logger.warning('Requeued %s and failed %s abandoned jobs', requeued, failed)
+        return failed + requeued
+    
+    @staticmethod
+    def run_worker(worker_id=None, poll_interval=None, max_jobs=None, burst=False, should_stop=lambda: False):
+        """Claim and run jobs until ``should_stop()`` is true
+        
+        With ``burst`` the worker exits as soon as the queue is empty. Returns
+        the number of jobs run.
+        """
+        worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        poll_interval = poll_interval or current_app.config.get('JOB_POLL_INTERVAL', 1.0)
+        processed = 0
+        logger.info('Job worker %s started', worker_id)
+        
+        while not should_stop():
+            JobService.requeue_stale()
+            job = JobService.claim_next(worker_id)
+            if job is None:
+                if burst:
+                    break
+                time.sleep(poll_interval)
+                continue
+            
+            JobService.execute(job)
+            # Start every job with an empty identity map
+            db.session.remove()
+            processed += 1
+            if max_jobs and processed >= max_jobs:
+                break
+        
+        logger.info('Job worker %s stopped after %s jobs', worker_id, processed)
+        return processed
+
+def _period_params(params):
+    try:
+        month = int(params.get('month'))
+        year = int(params.get('year'))
+    except (TypeError, ValueError):
+        raise ValueError('month and year are required integers')
+    if not 1 <= month <= 12:
+        raise ValueError('month must be between 1 and 12')
+    return {'month': month, 'year': year}
+
+def _chunk_size(params, default):
+    try:
+        chunk_size = int(params.get('chunk_size', default))
+    except (TypeError, ValueError):
+        raise ValueError('chunk_size must be an integer')
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    return chunk_size
+
+def _validate_create_runs(params):
+    try:
+        default_deductions = float(params.get('default_deductions', 0))
+    except (TypeError, ValueError):
+        raise ValueError('default_deductions must be a number')
+    return dict(
+        _period_params(params),
+        default_deductions=default_deductions,
+        chunk_size=_chunk_size(params, 5000)
+    )
+
+def _validate_process_month(params):
+    run_ids = params.get('run_ids')
+    if run_ids is not None and not isinstance(run_ids, list):
+        raise ValueError('run_ids must be a list')
+    return dict(
+        _period_params(params),
+        department=params.get('department'),
+        run_ids=run_ids,
+        chunk_size=_chunk_size(params, 500)
+    )
+
+def _validate_render_pdfs(params):
+    workers = params.get('workers')
+    if workers is not None:
+        try:
+            workers = int(workers)
+        except (TypeError, ValueError):
+            raise ValueError('workers must be an integer')
+        if workers < 1:
+            raise ValueError('workers must be positive')
+    return dict(_period_params(params), chunk_size=_chunk_size(params, 100), workers=workers)
+
+@job_type('payroll.create_runs', _validate_create_runs)
+def _create_runs(params, progress, created_by):
+    """Bulk-create draft runs, committing every chunk (progress writes are throttled separately)"""
+    from app.services.payroll_service import PayrollService
+    
+    def chunk_done(done, total):
+        # A retried job skips the runs of chunks that already committed
+        db.session.commit()
+        progress(done, total)
+    
+    result = PayrollService.create_bulk_payroll_runs(
+        params['month'], params['year'], params['default_deductions'], created_by,
+        chunk_size=params['chunk_size'], progress=chunk_done
+    )
+    db.session.commit()
+    return result
+
+@job_type('payroll.process_month', _validate_process_month)
+def _process_month(params, progress, created_by):
+    from app.services.payroll_service import PayrollService
+    
+    month, year = params['month'], params['year']
+    run_ids = PayrollService.find_draft_runs(month, year, params['department'], params['run_ids'])
+    progress(0, len(run_ids))
+    try:
+        return PayrollService.process_payroll_runs(month, year, run_ids, params['chunk_size'], progress)
+    finally:
+        # Earlier chunks may have committed even if a later one failed
+        invalidate_payroll_period(year, month)
+
+@job_type('payslips.render_pdfs', _validate_render_pdfs)
+def _render_pdfs(params, progress, created_by):
+    """Render a month's payslips into the PDF cache across a process pool so downloads are served from disk"""
+    from app.services.pdf_cache import PDFCache
+    
+    return PDFCache.render_month(params['month'], params['year'], chunk_size=params['chunk_size'],
+                                 progress=progress, workers=params.get('workers'))
@@ -1,6 +1,29 @@
+import logging
 from datetime import datetime, date
+import numpy as np
+from sqlalchemy import insert, select, update
 from app import db
-from app.models import Salary, Allowance, Deduction, Payslip, PayslipDetail, Employee
+from app.models import Salary, Allowance, Deduction, Payslip, PayslipDetail, Employee, PayrollRun
+from app.services.analytics_service import AnalyticsService
+
+# Progressive tax schedule: (upper bound, base tax, bracket floor, marginal rate)
+TAX_BRACKETS = (
+    (1000, 0, 0, 0.0),
+    (3000, 0, 1000, 0.1),
+    (5000, 200, 3000, 0.15),
+    (None, 500, 5000, 0.2),
+)
+
+# Column form of TAX_BRACKETS for the vectorized path
+_TAX_UPPERS = np.array([b[0] for b in TAX_BRACKETS[:-1]], dtype=float)
+_TAX_BASES = np.array([b[1] for b in TAX_BRACKETS], dtype=float)
+_TAX_FLOORS = np.array([b[2] for b in TAX_BRACKETS], dtype=float)
+_TAX_RATES = np.array([b[3] for b in TAX_BRACKETS], dtype=float)
+
+# Maximum number of ids per IN (...) clause when bulk loading cohort inputs
+LOOKUP_CHUNK_SIZE = 5000
+
+logger = logging.getLogger(__name__)
 
 class PayrollService:
     """Service for payroll calculations and processing"""
@@ -8,22 +31,22 @@ class PayrollService:
     @staticmethod
     def calculate_payroll(employee_id, month, year):
         """Calculate payroll for an employee for a specific month"""
-        print(f"DEBUG: Calculating payroll for employee {employee_id}, month {month}, year {year}")
+        logger.debug('Calculating payroll for employee %s, month %s, year %s', employee_id, month, year)
         
         employee = Employee.query.get(employee_id)
         if not employee:
-            print(f"DEBUG: Employee {employee_id} not found")
+            logger.debug('Employee %s not found', employee_id)
             return {'error': 'Employee not found'}
         
-        print(f"DEBUG: Found employee {employee.name}")
+        logger.debug('Found employee %s', employee.name)
         
         # Get active salary on the specified month/year
         salary = PayrollService._get_active_salary(employee_id, month, year)
         if not salary:
-            print(f"DEBUG: No salary found for employee {employee_id}")
+            logger.debug('No salary found for employee %s', employee_id)
             return {'error': f'No salary found for employee {employee.name}'}
         
-        print(f"DEBUG: Found salary {salary.basic_salary}")
+        logger.debug('Found salary %s', salary.basic_salary)
         basic_salary = salary.basic_salary
         
         # Calculate allowances
@@ -31,7 +54,7 @@ class PayrollService:
             Allowance.employee_id == employee_id,
             Allowance.start_date <= date(year, month, 28),
             db.or_(Allowance.end_date.is_(None), Allowance.end_date >= date(year, month, 1))
-        ).all()
+        ).order_by(Allowance.id).all()
         
         total_allowances = sum(a.amount for a in allowances)
         
@@ -40,7 +63,7 @@ class PayrollService:
             Deduction.employee_id == employee_id,
             Deduction.start_date <= date(year, month, 28),
             db.or_(Deduction.end_date.is_(None), Deduction.end_date >= date(year, month, 1))
-        ).all()
+        ).order_by(Deduction.id).all()
         
         total_deductions = sum(d.amount for d in deductions)
         
@@ -65,17 +88,485 @@ class PayrollService:
             'deductions_detail': [{'type': d.deduction_type, 'amount': d.amount} for d in deductions]
         }
     
+    @staticmethod
+    def create_bulk_payroll_runs(month, year, default_deductions, created_by, chunk_size=5000, progress=None):
+        """Create draft payroll runs for every active employee in a fixed number of queries
+        
+        Existing runs for the period and current salaries are preloaded up front,
+        and the new rows are written with executemany inserts of ``chunk_size`` rows.
+        ``progress(done, total)`` is called after each chunk. Employees that
+        already have a run are skipped, so a partly committed run can be resumed.
+        """
+        employees = db.session.query(Employee.id, Employee.name).filter(
+            Employee.is_active == True
+        ).order_by(Employee.id).all()
+        
+        # Employees that already have a run for this period are skipped
+        existing_ids = {
+            row.employee_id for row in db.session.query(PayrollRun.employee_id).filter(
+                PayrollRun.month == month,
+                PayrollRun.year == year
+            )
+        }
+        
+        # Current salary per employee (first matching row, as the per-employee lookup did)
+        current_salaries = {}
+        salary_rows = db.session.query(Salary.employee_id, Salary.basic_salary).join(
+            Employee, Employee.id == Salary.employee_id
+        ).filter(
+            Employee.is_active == True,
+            db.or_(Salary.end_date.is_(None), Salary.end_date >= date.today())
+        ).order_by(Salary.id)
+        for row in salary_rows:
+            current_salaries.setdefault(row.employee_id, row.basic_salary)
+        
+        rows = []
+        errors = []
+        skipped = 0
+        for employee in employees:
+            if employee.id in existing_ids:
+                skipped += 1
+                continue
+            
+            basic_salary = current_salaries.get(employee.id)
+            if basic_salary is None:
+                errors.append(f"No salary found for {employee.name}")
+                continue
+            
+            rows.append({
+                'employee_id': employee.id,
+                'month': month,
+                'year': year,
+                'basic_salary': basic_salary,
+                'deductions': default_deductions,
+                'net_salary': basic_salary - default_deductions,
+                'status': 'draft',
+                'created_by': created_by
+            })
+        
+        for offset in range(0, len(rows), chunk_size):
+            chunk = rows[offset:offset + chunk_size]
+            db.session.execute(insert(PayrollRun), chunk)
+            if progress:
+                progress(offset + len(chunk), len(rows))
+        
+        return {
+            'success_count': len(rows),
+            'skipped_count': skipped,
+            'error_count': len(errors),
+            'errors': errors
+        }
+    
+    @staticmethod
+    def calculate_run_payslip(basic_salary, run_deductions, allowances, deductions):
+        """Calculate payslip figures for a payroll run from its allowance and deduction records"""
+        total_allowances = sum(a.amount for a in allowances)
+        total_deductions = sum(d.amount for d in deductions) + run_deductions
+        gross_salary = basic_salary + total_allowances
+        tax = PayrollService._calculate_tax(gross_salary)
+        net_salary = gross_salary - total_deductions - tax
+        
+        return {
+            'basic_salary': basic_salary,
+            'total_allowances': total_allowances,
+            'total_deductions': total_deductions,
+            'gross_salary': gross_salary,
+            'tax': tax,
+            'net_salary': net_salary,
+            'allowances_detail': [{'type': a.allowance_type, 'amount': a.amount} for a in allowances],
+            'deductions_detail': [{'type': d.deduction_type, 'amount': d.amount} for d in deductions]
+        }
+    
+    @staticmethod
+    def payslip_detail_rows(payslip_id, payroll_calc):
+        """Build payslip_details rows (allowances, deductions, then income tax) for a payslip"""
+        rows = [
+            {'payslip_id': payslip_id, 'detail_type': 'allowance', 'description': a['type'], 'amount': a['amount']}
+            for a in payroll_calc['allowances_detail']
+        ]
+        rows.extend(
+            {'payslip_id': payslip_id, 'detail_type': 'deduction', 'description': d['type'], 'amount': d['amount']}
+            for d in payroll_calc['deductions_detail']
+        )
+        if payroll_calc['tax'] > 0:
+            rows.append({
+                'payslip_id': payslip_id,
+                'detail_type': 'deduction',
+                'description': 'Income Tax',
+                'amount': payroll_calc['tax']
+            })
+        return rows
+    
+    @staticmethod
+    def find_draft_runs(month, year, department=None, run_ids=None):
+        """Get ids of draft payroll runs for a period, optionally narrowed by department or run ids"""
+        query = db.session.query(PayrollRun.id).filter(
+            PayrollRun.month == month,
+            PayrollRun.year == year,
+            PayrollRun.status == 'draft'
+        )
+        if department:
+            query = query.join(Employee, Employee.id == PayrollRun.employee_id).filter(
+                Employee.department == department
+            )
+        if run_ids:
+            query = query.filter(PayrollRun.id.in_(run_ids))
+        return [row.id for row in query.order_by(PayrollRun.id)]
+    
+    @staticmethod
+    def process_payroll_runs(month, year, run_ids, chunk_size=500, progress=None):
+        """Process draft payroll runs of one period in chunks, committing after each chunk
+        
+        Every chunk costs a fixed number of queries: the runs, a conditional status
+        update claiming them, their allowances and deductions, existing payslips,
+        then bulk inserts for payslips and details. Figures come from the
+        vectorized cohort engine. ``progress(done, total)`` is called after each
+        chunk's commit.
+        """
+        period_start = date(year, month, 1)
+        period_end = date(year, month, 28)
+        processed_count = 0
+        payslip_count = 0
+        
+        for offset in range(0, len(run_ids), chunk_size):
+            chunk_ids = run_ids[offset:offset + chunk_size]
+            while True:
+                runs = db.session.query(
+                    PayrollRun.id, PayrollRun.employee_id, PayrollRun.basic_salary, PayrollRun.deductions,
+                    Employee.department
+                ).join(
+                    Employee, Employee.id == PayrollRun.employee_id
+                ).filter(
+                    PayrollRun.id.in_(chunk_ids),
+                    PayrollRun.status == 'draft'
+                ).order_by(PayrollRun.id).all()
+                if not runs:
+                    break
+                # Claim the runs before writing payslips; the status guard makes a
+                # concurrent processor (route, job or CLI) wait for us and then skip them
+                claimed = db.session.execute(
+                    update(PayrollRun)
+                    .where(PayrollRun.id.in_([run.id for run in runs]), PayrollRun.status == 'draft')
+                    .values(status='processed'),
+                    execution_options={'synchronize_session': False}
+                ).rowcount
+                if claimed == len(runs):
+                    break
+                # Someone processed part of the chunk between our read and the claim
+                db.session.rollback()
+            if not runs:
+                if progress:
+                    progress(offset + len(chunk_ids), len(run_ids))
+                continue
+            
+            employee_ids = [run.employee_id for run in runs]
+            allowances_by_employee = PayrollService._load_period_records(
+                Allowance, Allowance.allowance_type, employee_ids, period_start, period_end
+            )
+            deductions_by_employee = PayrollService._load_period_records(
+                Deduction, Deduction.deduction_type, employee_ids, period_start, period_end
+            )
+            
+            run_ids_in_chunk = [run.id for run in runs]
+            existing_run_ids = {
+                row.payroll_run_id for row in db.session.query(Payslip.payroll_run_id).filter(
+                    Payslip.payroll_run_id.in_(run_ids_in_chunk)
+                )
+            }
+            
+            new_runs = [run for run in runs if run.id not in existing_run_ids]
+            # One run per employee per period, so employee ids index the cohort
+            position = {run.employee_id: i for i, run in enumerate(new_runs)}
+            basic = np.array([run.basic_salary for run in new_runs], dtype=float)
+            total_allowances = PayrollService._sum_by_position(allowances_by_employee, position)
+            total_deductions = PayrollService._sum_by_position(deductions_by_employee, position) + np.array(
+                [run.deductions or 0 for run in new_runs], dtype=float
+            )
+            cohort = PayrollService.compute_cohort(basic, total_allowances, total_deductions)
+            
+            calcs = {}
+            payslip_rows = []
+            columns = zip(
+                basic.tolist(), total_allowances.tolist(), total_deductions.tolist(),
+                cohort['gross_salary'].tolist(), cohort['tax'].tolist(), cohort['net_salary'].tolist()
+            )
+            for run, (basic_salary, allowances_total, deductions_total, gross, tax, net) in zip(new_runs, columns):
+                calcs[run.id] = {
+                    'tax': tax,
+                    'allowances_detail': [
+                        {'type': a.allowance_type, 'amount': a.amount}
+                        for a in allowances_by_employee.get(run.employee_id, [])
+                    ],
+                    'deductions_detail': [
+                        {'type': d.deduction_type, 'amount': d.amount}
+                        for d in deductions_by_employee.get(run.employee_id, [])
+                    ]
+                }
+                payslip_rows.append({
+                    'payroll_run_id': run.id,
+                    'employee_id': run.employee_id,
+                    'basic_salary': basic_salary,
+                    'total_allowances': allowances_total,
+                    'total_deductions': deductions_total,
+                    'gross_salary': gross,
+                    'tax': tax,
+                    'net_salary': net,
+                    'payment_status': 'pending'
+                })
+            
+            if payslip_rows:
+                db.session.execute(insert(Payslip), payslip_rows)
+                
+                # Map the new payslip ids back to their runs to attach details
+                detail_rows = []
+                for row in db.session.query(Payslip.id, Payslip.payroll_run_id).filter(
+                    Payslip.payroll_run_id.in_(list(calcs))
+                ):
+                    detail_rows.extend(PayrollService.payslip_detail_rows(row.id, calcs[row.payroll_run_id]))
+                if detail_rows:
+                    db.session.execute(insert(PayslipDetail), detail_rows)
+                
+                AnalyticsService.apply_payslips(
+                    dict(row, year=year, month=month, department=run.department)
+                    for run, row in zip(new_runs, payslip_rows)
+                )
+            
+            db.session.commit()
+            
+            processed_count += len(runs)
+            payslip_count += len(payslip_rows)
+            if progress:
+                progress(offset + len(chunk_ids), len(run_ids))
+        
+        return {
+            'processed_count': processed_count,
+            'payslip_count': payslip_count
+        }
+    
+    @staticmethod
+    def calculate_cohort(employee_ids, month, year, scope=None):
+        """Calculate payroll for a cohort of employees in one vectorized pass
+        
+        Inputs are bulk loaded into column arrays aligned with ``employee_ids``;
+        the results match ``calculate_payroll`` exactly for every employee with
+        an active salary. Employees without one are flagged in ``has_salary``
+        and carry NaN amounts. ``scope`` is an optional SELECT of employee ids
+        covering the cohort; inputs are then loaded with one query per table
+        instead of chunked id lists.
+        """
+        employee_ids = list(employee_ids)
+        period_start = date(year, month, 1)
+        period_end = date(year, month, 28)
+        position = {employee_id: i for i, employee_id in enumerate(employee_ids)}
+        
+        salaries = PayrollService._load_active_salaries(employee_ids, period_start, scope)
+        allowances = PayrollService._load_period_records(
+            Allowance, Allowance.allowance_type, employee_ids, period_start, period_end, scope
+        )
+        deductions = PayrollService._load_period_records(
+            Deduction, Deduction.deduction_type, employee_ids, period_start, period_end, scope
+        )
+        
+        basic = np.array([salaries.get(employee_id, np.nan) for employee_id in employee_ids], dtype=float)
+        total_allowances = PayrollService._sum_by_position(allowances, position)
+        total_deductions = PayrollService._sum_by_position(deductions, position)
+        cohort = PayrollService.compute_cohort(basic, total_allowances, total_deductions)
+        
+        return {
+            'employee_ids': np.array(employee_ids, dtype=np.int64),
+            'has_salary': ~np.isnan(basic),
+            'basic_salary': basic,
+            'total_allowances': total_allowances,
+            'total_deductions': total_deductions,
+            'gross_salary': cohort['gross_salary'],
+            'tax': cohort['tax'],
+            'net_salary': cohort['net_salary'],
+            'allowances_detail': {
+                employee_id: [{'type': a.allowance_type, 'amount': a.amount} for a in records]
+                for employee_id, records in allowances.items()
+            },
+            'deductions_detail': {
+                employee_id: [{'type': d.deduction_type, 'amount': d.amount} for d in records]
+                for employee_id, records in deductions.items()
+            }
+        }
+    
+    @staticmethod
+    def iter_cohort_results(cohort):
+        """Yield per-employee results of a cohort in the shape returned by calculate_payroll"""
+        columns = zip(
+            cohort['employee_ids'].tolist(),
+            cohort['has_salary'].tolist(),
+            cohort['basic_salary'].tolist(),
+            cohort['total_allowances'].tolist(),
+            cohort['total_deductions'].tolist(),
+            cohort['gross_salary'].tolist(),
+            cohort['tax'].tolist(),
+            cohort['net_salary'].tolist()
+        )
+        for employee_id, has_salary, basic, allowances, deductions, gross, tax, net in columns:
+            if not has_salary:
+                continue
+            yield {
+                'employee_id': employee_id,
+                'basic_salary': basic,
+                'total_allowances': allowances,
+                'total_deductions': deductions,
+                'gross_salary': gross,
+                'tax': tax,
+                'net_salary': net,
+                'allowances_detail': cohort['allowances_detail'].get(employee_id, []),
+                'deductions_detail': cohort['deductions_detail'].get(employee_id, [])
+            }
+    
+    @staticmethod
+    def preview_month(month, year, department=None):
+        """Dry-run a month's payroll for every active employee without writing anything
+        
+        Costs four queries whatever the headcount: the employees, then their
+        salaries, allowances and deductions through calculate_cohort. Returns
+        overall and per-department totals plus an ``employees`` iterator of
+        per-employee figures (None amounts for employees without a salary).
+        """
+        criteria = [Employee.is_active == True]
+        if department:
+            criteria.append(Employee.department == department)
+        employees = db.session.query(
+            Employee.id, Employee.employee_id, Employee.name, Employee.department
+        ).filter(*criteria).order_by(Employee.id).all()
+        
+        cohort = PayrollService.calculate_cohort(
+            [e.id for e in employees], month, year,
+            scope=select(Employee.id).where(*criteria)
+        )
+        has_salary = cohort['has_salary']
+        
+        # Per-department sums over employees with a salary, via bincount on department codes
+        names = sorted({e.department or '' for e in employees})
+        codes = {name: i for i, name in enumerate(names)}
+        department_index = np.array([codes[e.department or ''] for e in employees], dtype=np.int64)[has_salary]
+        
+        def totals(column):
+            return np.bincount(department_index, weights=cohort[column][has_salary], minlength=len(names))
+        
+        columns = ('basic_salary', 'total_allowances', 'total_deductions', 'gross_salary', 'tax', 'net_salary')
+        sums = {column: totals(column) for column in columns}
+        counts = np.bincount(department_index, minlength=len(names))
+        departments = [
+            dict(
+                {'department': name or 'Unassigned', 'employee_count': int(counts[i])},
+                **{column: float(sums[column][i]) for column in columns}
+            )
+            for i, name in enumerate(names)
+        ]
+        
+        def rows():
+            values = zip(*(cohort[column].tolist() for column in columns))
+            for employee, with_salary, amounts in zip(employees, has_salary.tolist(), values):
+                yield dict(
+                    {
+                        'id': employee.id,
+                        'employee_id': employee.employee_id,
+                        'name': employee.name,
+                        'department': employee.department,
+                        'has_salary': with_salary
+                    },
+                    **dict(zip(columns, amounts if with_salary else (None,) * len(columns)))
+                )
+        
+        return {
+            'month': month,
+            'year': year,
+            'summary': dict(
+                {
+                    'employee_count': int(has_salary.sum()),
+                    'missing_salary_count': int(len(employees) - has_salary.sum())
+                },
+                **{column: float(sums[column].sum()) for column in columns}
+            ),
+            'departments': departments,
+            'employees': rows()
+        }
+    
+    @staticmethod
+    def compute_cohort(basic_salary, total_allowances, total_deductions):
+        """Compute gross, tax and net salary arrays from aligned input arrays"""
+        gross_salary = basic_salary + total_allowances
+        tax = PayrollService._calculate_tax_vector(gross_salary)
+        net_salary = gross_salary - total_deductions - tax
+        return {
+            'gross_salary': gross_salary,
+            'tax': tax,
+            'net_salary': net_salary
+        }
+    
+    @staticmethod
+    def _employee_filters(column, employee_ids, scope=None):
+        """Yield IN filters on an employee id column: the scope SELECT, or chunks of ids"""
+        if scope is not None:
+            yield column.in_(scope)
+            return
+        for offset in range(0, len(employee_ids), LOOKUP_CHUNK_SIZE):
+            yield column.in_(employee_ids[offset:offset + LOOKUP_CHUNK_SIZE])
+    
+    @staticmethod
+    def _load_active_salaries(employee_ids, target_date, scope=None):
+        """Get the active basic salary per employee on a date, latest start date winning"""
+        salaries = {}
+        for employee_filter in PayrollService._employee_filters(Salary.employee_id, employee_ids, scope):
+            rows = db.session.query(Salary.employee_id, Salary.basic_salary).filter(
+                employee_filter,
+                Salary.start_date <= target_date,
+                db.or_(Salary.end_date.is_(None), Salary.end_date >= target_date)
+            ).order_by(Salary.employee_id, Salary.start_date.desc(), Salary.id)
+            for row in rows:
+                salaries.setdefault(row.employee_id, row.basic_salary)
+        return salaries
+    
+    @staticmethod
+    def _load_period_records(model, type_column, employee_ids, period_start, period_end, scope=None):
+        """Get allowance or deduction rows overlapping a period, grouped by employee in id order"""
+        records = {}
+        for employee_filter in PayrollService._employee_filters(model.employee_id, employee_ids, scope):
+            rows = db.session.query(model.employee_id, type_column, model.amount).filter(
+                employee_filter,
+                model.start_date <= period_end,
+                db.or_(model.end_date.is_(None), model.end_date >= period_start)
+            ).order_by(model.id)
+            for row in rows:
+                records.setdefault(row.employee_id, []).append(row)
+        return records
+    
+    @staticmethod
+    def _sum_by_position(records_by_employee, position):
+        """Sum record amounts per cohort position, in record order like the scalar sum()"""
+        indexes = []
+        amounts = []
+        for employee_id, records in records_by_employee.items():
+            i = position.get(employee_id)
+            if i is None:
+                continue
+            for record in records:
+                indexes.append(i)
+                amounts.append(record.amount)
+        return np.bincount(
+            np.array(indexes, dtype=np.int64),
+            weights=np.array(amounts, dtype=float),
+            minlength=len(position)
+        ).astype(float)
+    
     @staticmethod
     def _get_active_salary(employee_id, month, year):
         """Get active salary for employee on specific month/year"""
         target_date = date(year, month, 1)
-        print(f"DEBUG: Looking for salary for employee {employee_id} on {target_date}")
+        logger.debug('Looking for salary for employee %s on %s', employee_id, target_date)
         
-        # First, check all salaries for this employee
-        all_salaries = Salary.query.filter(Salary.employee_id == employee_id).all()
-        print(f"DEBUG: Found {len(all_salaries)} total salaries for employee {employee_id}")
-        for s in all_salaries:
-            print(f"DEBUG: Salary {s.id}: {s.basic_salary}, start: {s.start_date}, end: {s.end_date}")
+        # Salary history is only loaded when someone is reading debug output
+        if logger.isEnabledFor(logging.DEBUG):
+            all_salaries = Salary.query.filter(Salary.employee_id == employee_id).all()
+            logger.debug('Found %d total salaries for employee %s', len(all_salaries), employee_id)
+            for s in all_salaries:
+                logger.debug('Salary %s: %s, start: %s, end: %s', s.id, s.basic_salary, s.start_date, s.end_date)
         
         salary = Salary.query.filter(
             Salary.employee_id == employee_id,
@@ -84,21 +575,21 @@ class PayrollService:
         ).order_by(Salary.start_date.desc()).first()
         
         if salary:
-            print(f"DEBUG: Selected salary {salary.id}: {salary.basic_salary}")
+            logger.debug('Selected salary %s: %s', salary.id, salary.basic_salary)
         else:
-            print(f"DEBUG: No active salary found for employee {employee_id} on {target_date}")
-            
+            logger.debug('No active salary found for employee %s on %s', employee_id, target_date)
+        
         return salary
     
     @staticmethod
     def _calculate_tax(gross_salary):
         """Calculate tax based on gross salary"""
-        # Simple tax bracket system - customize as needed
-        if gross_salary <= 1000:
-            return 0
-        elif gross_salary <= 3000:
-            return (gross_salary - 1000) * 0.1
-        elif gross_salary <= 5000:
-            return 200 + (gross_salary - 3000) * 0.15
-        else:
-            return 500 + (gross_salary - 5000) * 0.2
+        for upper, base, floor, rate in TAX_BRACKETS:
+            if upper is None or gross_salary <= upper:
+                return base + (gross_salary - floor) * rate
+    
+    @staticmethod
+    def _calculate_tax_vector(gross_salary):
+        """Calculate tax for an array of gross salaries with the same brackets as _calculate_tax"""
+        bracket = np.searchsorted(_TAX_UPPERS, gross_salary, side='left')
+        return _TAX_BASES[bracket] + (gross_salary - _TAX_FLOORS[bracket]) * _TAX_RATES[bracket]
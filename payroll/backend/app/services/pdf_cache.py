@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import os
+import zipfile
+from flask import current_app
+from app.services.pdf_service import PDFService, TEMPLATE_VERSION, write_pdf
+
+logger = logging.getLogger(__name__)
+
+class PDFCache:
+    """Content-addressed on-disk cache of rendered payslip PDFs"""
+    
+    @staticmethod
+    def cache_key(data):
+        """Hash serialized payslip data together with the template version"""
+        payload = json.dumps(data, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(f'{TEMPLATE_VERSION}:{payload}'.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def cache_dir():
+        """Get the cache directory from config, defaulting to the instance folder"""
+        return current_app.config.get('PDF_CACHE_DIR') or os.path.join(
+            current_app.instance_path, 'pdf_cache'
+        )
+    
+    @staticmethod
+    def path_for(key, cache_dir=None):
+        """Get the file path for a cache key, sharded by its first two characters"""
+        return os.path.join(cache_dir or PDFCache.cache_dir(), key[:2], f'{key}.pdf')
+    
+    @staticmethod
+    def get_or_render(data, key=None, cache_dir=None):
+        """Return the path of the cached PDF for payslip data, rendering it on a miss"""
+        key = key or PDFCache.cache_key(data)
+        path = PDFCache.path_for(key, cache_dir)
+        if os.path.exists(path):
+            return path
+        
+        write_pdf(path, PDFService.render_payslip(data))
+        return path
+    
+    @staticmethod
+    def render_month(month, year, department=None, chunk_size=100, progress=None, workers=None):
+        """Make sure every payslip of a month is in the cache, rendering the missing ones
+        
+        Payslips are read in batches and the missing ones are rendered across
+        PDFService.render_pooled's process pool (``workers`` processes,
+        PDF_RENDER_WORKERS by default). Already cached payslips are skipped, so
+        an interrupted run resumes where it stopped; a payslip that fails to
+        render is logged and counted without stopping the month.
+        ``progress(done, total)`` is called every ``chunk_size`` payslips and
+        at the end.
+        """
+        total = PDFService.count_payslips(month, year, department=department)
+        cache_dir = PDFCache.cache_dir()
+        counts = {'rendered_count': 0, 'cached_count': 0, 'failed_count': 0}
+        
+        def advance(outcome):
+            counts[outcome] += 1
+            done = sum(counts.values())
+            if progress and done % chunk_size == 0:
+                progress(done, total)
+        
+        def missing():
+            for data in PDFService.iter_payslip_data(month, year, department=department):
+                path = PDFCache.path_for(PDFCache.cache_key(data), cache_dir)
+                if os.path.exists(path):
+                    advance('cached_count')
+                else:
+                    yield data, path
+        
+        for result in PDFService.render_pooled(missing(), workers):
+            if result['error']:
+                logger.warning('Payslip %s failed to render: %s', result['payslip_id'], result['error'])
+                advance('failed_count')
+            else:
+                advance('rendered_count')
+        done = sum(counts.values())
+        if progress and done % chunk_size:
+            progress(done, total)
+        return counts
+    
+    @staticmethod
+    def iter_zip(payslips_data, folder=None, cache_dir=None):
+        """Yield a ZIP archive of payslip PDFs as it is built, one chunk per entry
+        
+        Each PDF comes from the cache (rendered on a miss) and is written as
+        soon as it is available, so only the current PDF and the ZIP central
+        directory are held in memory. PDFs are already compressed, so entries
+        are stored rather than deflated.
+        """
+        cache_dir = cache_dir or PDFCache.cache_dir()
+        sink = _ChunkSink()
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+            for data in payslips_data:
+                with open(PDFCache.get_or_render(data, cache_dir=cache_dir), 'rb') as f:
+                    pdf_bytes = f.read()
+                name = PDFService.payslip_filename(data)
+                archive.writestr(f'{folder}/{name}' if folder else name, pdf_bytes)
+                yield sink.drain()
+        # Central directory
+        yield sink.drain()
+
+class _ChunkSink:
+    """Write-only, unseekable file object that collects bytes until drained"""
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
@@ -1,10 +1,27 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from io import BytesIO
 from datetime import datetime
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+from functools import lru_cache
+
+# ReportLab is imported on first render, not with this module, so processes
+# that never produce a PDF do not pay for it
+
+# Bump whenever the payslip layout changes so cached PDFs are re-rendered
+TEMPLATE_VERSION = '2'
+
+# Payslips queued per pool worker by render_pooled; bounds how much of the
+# input is read ahead of the renders
+RENDER_BATCH_QUEUE_PER_WORKER = 4
+
+logger = logging.getLogger(__name__)
 
 class PDFService:
     """Service for generating PDF payslips"""
@@ -12,8 +29,70 @@ class PDFService:
     @staticmethod
     def generate_payslip_pdf(payslip, employee, payroll_run):
         """Generate PDF for a payslip"""
+        data = PDFService.serialize_payslip(payslip, employee, payroll_run)
+        return BytesIO(PDFService.render_payslip(data))
+    
+    @staticmethod
+    def serialize_payslip(payslip, employee, payroll_run):
+        """Flatten a payslip with its employee and run into plain data for rendering"""
+        return {
+            'payslip_id': payslip.id,
+            'employee': {
+                'name': employee.name,
+                'employee_id': employee.employee_id,
+                'department': employee.department,
+                'position': employee.position
+            },
+            'month': payroll_run.month,
+            'year': payroll_run.year,
+            # Stable per payslip so re-renders are byte-identical
+            'generated': (payslip.created_at or datetime.now()).strftime('%Y-%m-%d'),
+            'basic_salary': float(payslip.basic_salary),
+            'total_allowances': float(payslip.total_allowances),
+            'gross_salary': float(payslip.gross_salary),
+            'total_deductions': float(payslip.total_deductions),
+            'tax': float(payslip.tax),
+            'net_salary': float(payslip.net_salary)
+        }
+    
+    @staticmethod
+    def payslip_filename(data):
+        """Get the download file name for serialized payslip data"""
+        return f"payslip_{data['employee']['employee_id']}_{data['year']}_{data['month']}.pdf"
+    
+    @staticmethod
+    def warm_up():
+        """Import ReportLab and compile the payslip page template ahead of the first render"""
+        _payslip_template()
+    
+    @staticmethod
+    def render_payslip(data):
+        """Render serialized payslip data to PDF bytes
+        
+        Draws the payslip's values onto the precompiled page template; text
+        the template's WinAnsi fonts cannot encode falls back to the Platypus
+        renderer instead.
+        """
+        try:
+            return _payslip_template().render(data)
+        except UnicodeEncodeError:
+            logger.debug('Payslip %s has text outside WinAnsi, using Platypus',
+                         data.get('payslip_id'))
+            return PDFService.render_payslip_platypus(data)
+    
+    @staticmethod
+    def render_payslip_platypus(data):
+        """Render serialized payslip data to PDF bytes with the Platypus layout engine"""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        
+        employee = data['employee']
         buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
+        # invariant pins the PDF creation date and document id
+        doc = SimpleDocTemplate(buffer, pagesize=letter, invariant=True)
         elements = []
         
         styles = getSampleStyleSheet()
@@ -31,10 +110,10 @@ class PDFService:
         
         # Employee information
         emp_info = [
-            ['Employee Name:', employee.name],
-            ['Employee ID:', employee.employee_id],
-            ['Department:', employee.department or 'N/A'],
-            ['Position:', employee.position or 'N/A'],
+            ['Employee Name:', employee['name']],
+            ['Employee ID:', employee['employee_id']],
+            ['Department:', employee['department'] or 'N/A'],
+            ['Position:', employee['position'] or 'N/A'],
         ]
         
         emp_table = Table(emp_info, colWidths=[2*inch, 4*inch])
@@ -53,8 +132,8 @@ class PDFService:
         
         # Payroll period
         period_info = [
-            ['Month:', f"{payroll_run.month}/{payroll_run.year}"],
-            ['Generated:', datetime.now().strftime('%Y-%m-%d')],
+            ['Month:', f"{data['month']}/{data['year']}"],
+            ['Generated:', data['generated']],
         ]
         
         period_table = Table(period_info, colWidths=[2*inch, 4*inch])
@@ -71,12 +150,12 @@ class PDFService:
         # Salary details
         salary_data = [
             ['Description', 'Amount'],
-            ['Basic Salary', f"${payslip.basic_salary:.2f}"],
-            ['Total Allowances', f"${payslip.total_allowances:.2f}"],
-            ['Gross Salary', f"${payslip.gross_salary:.2f}"],
-            ['Total Deductions', f"${payslip.total_deductions:.2f}"],
-            ['Tax', f"${payslip.tax:.2f}"],
-            ['Net Salary', f"${payslip.net_salary:.2f}"],
+            ['Basic Salary', f"${data['basic_salary']:.2f}"],
+            ['Total Allowances', f"${data['total_allowances']:.2f}"],
+            ['Gross Salary', f"${data['gross_salary']:.2f}"],
+            ['Total Deductions', f"${data['total_deductions']:.2f}"],
+            ['Tax', f"${data['tax']:.2f}"],
+            ['Net Salary', f"${data['net_salary']:.2f}"],
         ]
         
         salary_table = Table(salary_data, colWidths=[3*inch, 3*inch])
@@ -97,5 +176,421 @@ class PDFService:
         elements.append(salary_table)
         
         doc.build(elements)
-        buffer.seek(0)
-        return buffer
+        return buffer.getvalue()
+    
+    @staticmethod
+    def load_payslip_data(month=None, year=None, payslip_ids=None):
+        """Load serialized payslip data for a payroll month or a list of payslip ids in one query
+        
+        Holds every payslip in memory; use iter_payslip_data for large sets.
+        """
+        return list(PDFService.iter_payslip_data(month, year, payslip_ids=payslip_ids, batch_size=None))
+    
+    @staticmethod
+    def iter_payslip_data(month=None, year=None, payslip_ids=None, department=None, employee_id=None,
+                          batch_size=500):
+        """Yield serialized payslip data in payslip id order from a joined query
+        
+        With ``batch_size`` the rows are read in keyset batches of that size
+        (one query each, seeking past the last payslip id), so memory does not
+        grow with the result. Each batch is serialized before it is yielded and
+        no cursor stays open between batches, so callers may commit while
+        iterating, as the chunked progress callbacks do. ``month`` alone is
+        ignored; pass it together with ``year``.
+        """
+        from app.models import Payslip
+        
+        query = PDFService._payslip_query(month, year, payslip_ids, department, employee_id)
+        query = query.order_by(Payslip.id)
+        if not batch_size:
+            for payslip, employee, payroll_run in query:
+                yield PDFService.serialize_payslip(payslip, employee, payroll_run)
+            return
+        
+        last_id = 0
+        while True:
+            batch = [
+                PDFService.serialize_payslip(payslip, employee, payroll_run)
+                for payslip, employee, payroll_run in query.filter(Payslip.id > last_id).limit(batch_size)
+            ]
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1]['payslip_id']
+    
+    @staticmethod
+    def count_payslips(month=None, year=None, payslip_ids=None, department=None):
+        """Count the payslips iter_payslip_data yields for the same filters"""
+        from sqlalchemy import func
+        from app.models import Payslip
+        
+        query = PDFService._payslip_query(month, year, payslip_ids, department)
+        return query.with_entities(func.count(Payslip.id)).scalar()
+    
+    @staticmethod
+    def _payslip_query(month=None, year=None, payslip_ids=None, department=None, employee_id=None):
+        from app import db
+        from app.models import Payslip, Employee, PayrollRun
+        
+        query = db.session.query(Payslip, Employee, PayrollRun).join(
+            Employee, Employee.id == Payslip.employee_id
+        ).join(
+            PayrollRun, PayrollRun.id == Payslip.payroll_run_id
+        )
+        if year:
+            query = query.filter(PayrollRun.year == year)
+            if month:
+                query = query.filter(PayrollRun.month == month)
+        if payslip_ids:
+            query = query.filter(Payslip.id.in_(payslip_ids))
+        if department:
+            query = query.filter(Employee.department == department)
+        if employee_id:
+            query = query.filter(Payslip.employee_id == employee_id)
+        return query
+    
+    @staticmethod
+    def render_pooled(jobs, workers=None):
+        """Render ``(payslip data, path)`` jobs across a process pool, yielding results as they finish
+        
+        A job with a path is written there atomically; without one the result
+        carries the PDF bytes under ``pdf``. ``jobs`` is read lazily with at
+        most RENDER_BATCH_QUEUE_PER_WORKER jobs per worker in flight, so it can
+        come straight from iter_payslip_data(). ``workers`` defaults to the
+        PDF_RENDER_WORKERS setting (one per CPU when unset). Workers start from
+        a fork server rather than the caller, so they never inherit its
+        database connections; like any spawned worker they re-import the main
+        module, so scripts calling this need an ``if __name__ == '__main__'``
+        guard.
+        """
+        workers = workers or _configured_render_workers()
+        max_pending = (workers or os.cpu_count() or 1) * RENDER_BATCH_QUEUE_PER_WORKER
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+            pending = set()
+            for data, path in jobs:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(executor.submit(_render_job, data, path))
+            for future in wait(pending).done:
+                yield future.result()
+    
+    @staticmethod
+    def render_payslips(output, month=None, year=None, payslip_ids=None, department=None,
+                        workers=None, chunk_size=100, progress=None):
+        """Render a payroll month or a list of payslip ids into a directory or a .zip archive
+        
+        Payslip data is read in batches from a server-side cursor and fed to
+        render_batch, so the month is never loaded at once. ``progress(done,
+        total)`` is called every ``chunk_size`` payslips and at the end.
+        """
+        total = PDFService.count_payslips(month, year, payslip_ids, department)
+        payslips_data = PDFService.iter_payslip_data(
+            month, year, payslip_ids=payslip_ids, department=department
+        )
+        return PDFService.render_batch(
+            payslips_data, output, workers=workers, chunk_size=chunk_size,
+            progress=(lambda done: progress(done, total)) if progress else None
+        )
+    
+    @staticmethod
+    def render_batch(payslips_data, output, workers=None, chunk_size=100, progress=None):
+        """Render serialized payslips across a process pool into a directory or a .zip archive
+        
+        Workers only receive plain payslip data, through render_pooled. Returns
+        a report with per-file timing and any failures; one failed payslip
+        does not stop the batch. ``progress(done)`` is called every
+        ``chunk_size`` payslips and at the end.
+        """
+        to_archive = output.endswith('.zip')
+        target_dir = os.path.dirname(os.path.abspath(output)) if to_archive else output
+        os.makedirs(target_dir, exist_ok=True)
+        
+        jobs = (
+            (data, None if to_archive else os.path.join(output, PDFService.payslip_filename(data)))
+            for data in payslips_data
+        )
+        files = []
+        started = time.perf_counter()
+        archive = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) if to_archive else None
+        try:
+            for result in PDFService.render_pooled(jobs, workers):
+                pdf_bytes = result.pop('pdf', None)
+                if archive is not None and pdf_bytes is not None:
+                    archive.writestr(result['filename'], pdf_bytes)
+                files.append(result)
+                if progress and len(files) % chunk_size == 0:
+                    progress(len(files))
+        finally:
+            if archive is not None:
+                archive.close()
+        if progress and len(files) % chunk_size:
+            progress(len(files))
+        
+        files.sort(key=lambda f: f['payslip_id'])
+        failed = [f for f in files if f['error']]
+        return {
+            'output': output,
+            'rendered': len(files) - len(failed),
+            'failed': len(failed),
+            'elapsed': round(time.perf_counter() - started, 3),
+            'files': files
+        }
+
+
+def _configured_render_workers():
+    from flask import current_app, has_app_context
+    return current_app.config.get('PDF_RENDER_WORKERS') if has_app_context() else None
+
+def _pool_context():
+    # A fork of the caller would share its open database sockets
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return None
+
+def write_pdf(path, pdf_bytes):
+    """Write a PDF through a temp file and rename, so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _render_job(data, path):
+    """Process pool entry point: render one payslip, writing it to path when given"""
+    started = time.perf_counter()
+    result = {'payslip_id': data['payslip_id'], 'filename': None, 'error': None}
+    try:
+        result['filename'] = PDFService.payslip_filename(data)
+        pdf_bytes = PDFService.render_payslip(data)
+        if path:
+            write_pdf(path, pdf_bytes)
+        else:
+            result['pdf'] = pdf_bytes
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    return result
+
+class _PayslipTemplate:
+    """The one-page payslip layout, compiled once per process into a PDF template
+    
+    Reproduces render_payslip_platypus (letter page, 1in margins, tables
+    centred in the frame, same styles and positions) with every coordinate,
+    colour and static label resolved up front. The static runs of the page
+    content and every PDF object except the content stream are serialized
+    once, so a render only formats the payslip's own values into their slots,
+    compresses the content stream and appends it with the cross-reference
+    table.
+    """
+    
+    # Table geometry from the Platypus styles: rows are leading + 3pt top
+    # padding + bottom padding high, baselines sit bottom padding + leading
+    # - font size above the row bottom, cells are padded 6pt left and right
+    LEADING = 12
+    PADDING = 6
+    
+    # Standard Type 1 fonts, referenced from the content stream by these names
+    FONTS = {'Helvetica': 'F1', 'Helvetica-Bold': 'F2'}
+    
+    def __init__(self):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        
+        self.string_width = stringWidth
+        # Content operators in drawing order; field slots are tuples
+        self.ops = []
+        width, height = letter
+        frame_width = width - 2 * inch - 2 * self.PADDING
+        self.left = inch + self.PADDING + (frame_width - 6 * inch) / 2
+        
+        # Title: Heading1 (22pt leading) at 16pt, 12pt space after, then a 0.2in spacer
+        top = height - inch - self.PADDING
+        self._fill(colors.HexColor('#1f2937'))
+        self._text(inch + self.PADDING, top - 22 + 6, 'PAYSLIP', 'Helvetica-Bold', 16)
+        top -= 22 + 12 + 0.2 * inch
+        
+        # Employee information: bold labels on a grey column, gridded
+        rows = [('Employee Name:', 'name'), ('Employee ID:', 'employee_id'),
+                ('Department:', 'department'), ('Position:', 'position')]
+        self._fill(colors.lightgrey)
+        self._rect(self.left, top - len(rows) * 21, 2 * inch, len(rows) * 21)
+        self._fill(colors.black)
+        for (label, key), y in zip(rows, self._baselines(top, len(rows), 6)):
+            self._text(self.left + self.PADDING, y, label, 'Helvetica-Bold', 10)
+            self.ops.append((key, self.left + 2 * inch + self.PADDING, y, 'Helvetica', 10, False))
+        self._grid(top, [2 * inch, 4 * inch], [21] * len(rows))
+        top -= len(rows) * 21 + 0.3 * inch
+        
+        # Payroll period: plain, no grid
+        rows = [('Month:', 'period'), ('Generated:', 'generated')]
+        for (label, key), y in zip(rows, self._baselines(top, len(rows), 6)):
+            self._text(self.left + self.PADDING, y, label, 'Helvetica', 10)
+            self.ops.append((key, self.left + 2 * inch + self.PADDING, y, 'Helvetica', 10, False))
+        top -= len(rows) * 21 + 0.3 * inch
+        
+        # Salary details: blue header, right-aligned amounts, bold highlighted net row
+        rows = [('Basic Salary', 'basic_salary'), ('Total Allowances', 'total_allowances'),
+                ('Gross Salary', 'gross_salary'), ('Total Deductions', 'total_deductions'),
+                ('Tax', 'tax'), ('Net Salary', 'net_salary')]
+        row_height = self.LEADING + 3 + 8
+        table_height = (len(rows) + 1) * row_height
+        right = self.left + 6 * inch - self.PADDING
+        header_y = top - row_height + 8 + self.LEADING - 11
+        self._fill(colors.HexColor('#3b82f6'))
+        self._rect(self.left, top - row_height, 6 * inch, row_height)
+        self._fill(colors.HexColor('#e0f2fe'))
+        self._rect(self.left, top - table_height, 6 * inch, row_height)
+        self._fill(colors.whitesmoke)
+        self._text(self.left + self.PADDING, header_y, 'Description', 'Helvetica-Bold', 11)
+        self._text(right - stringWidth('Amount', 'Helvetica-Bold', 11), header_y, 'Amount', 'Helvetica-Bold', 11)
+        self._fill(colors.black)
+        for i, (label, key) in enumerate(rows):
+            font, size = ('Helvetica-Bold', 12) if i == len(rows) - 1 else ('Helvetica', 10)
+            y = top - (i + 2) * row_height + 8 + self.LEADING - size
+            self._text(self.left + self.PADDING, y, label, font, size)
+            self.ops.append((key, right, y, font, size, True))
+        self._grid(top, [3 * inch, 3 * inch], [row_height] * (len(rows) + 1))
+        
+        # Join each run of static operators into one byte string
+        self.program = []
+        for op in self.ops:
+            if isinstance(op, tuple):
+                self.program.append(op)
+            elif self.program and isinstance(self.program[-1], bytes):
+                self.program[-1] += op.encode('latin-1') + b'\n'
+            else:
+                self.program.append(op.encode('latin-1') + b'\n')
+        self._compile_document(width, height)
+    
+    def _baselines(self, top, row_count, bottom_padding):
+        """Baselines of the rows (10pt text) of a table whose top edge is at ``top``"""
+        row_height = self.LEADING + 3 + bottom_padding
+        return [top - (i + 1) * row_height + bottom_padding + self.LEADING - 10 for i in range(row_count)]
+    
+    def _fill(self, color):
+        self.ops.append(f'{_num(color.red)} {_num(color.green)} {_num(color.blue)} rg')
+    
+    def _rect(self, x, y, width, height):
+        self.ops.append(f'{_num(x)} {_num(y)} {_num(width)} {_num(height)} re f')
+    
+    def _text(self, x, y, text, font, size):
+        self.ops.append(_text_op(x, y, _pdf_string(text), self.FONTS[font], size).decode('latin-1'))
+    
+    def _grid(self, top, col_widths, row_heights):
+        """1pt grey grid lines around and between all cells"""
+        x0, x1 = self.left, self.left + sum(col_widths)
+        bottom = top - sum(row_heights)
+        lines = [(x0, top, x1, top), (x0, bottom, x1, bottom), (x0, bottom, x0, top), (x1, bottom, x1, top)]
+        y = top
+        for row_height in row_heights[:-1]:
+            y -= row_height
+            lines.append((x0, y, x1, y))
+        x = x0
+        for col_width in col_widths[:-1]:
+            x += col_width
+            lines.append((x, bottom, x, top))
+        from reportlab.lib.colors import grey
+        
+        self.ops.append(f'q {_num(grey.red)} {_num(grey.green)} {_num(grey.blue)} RG 1 w 1 J 1 j')
+        self.ops.extend(f'{_num(a)} {_num(b)} m {_num(c)} {_num(d)} l' for a, b, c, d in lines)
+        self.ops.append('S Q')
+    
+    def _compile_document(self, width, height):
+        """Serialize every object but the content stream (always the last object)"""
+        font_refs = ' '.join(f'/{name} {4 + i} 0 R' for i, name in enumerate(self.FONTS.values()))
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+            (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_num(width)} {_num(height)}] '
+             f'/Resources << /Font << {font_refs} >> /ProcSet [/PDF /Text] >> '
+             f'/Contents {4 + len(self.FONTS) + 1} 0 R >>').encode('latin-1')
+        ]
+        objects += [
+            f'<< /Type /Font /Subtype /Type1 /BaseFont /{font} /Encoding /WinAnsiEncoding >>'.encode('latin-1')
+            for font in self.FONTS
+        ]
+        objects.append(b'<< /Producer (Payroll) /Title (Payslip) >>')
+        self.info_number = len(objects)
+        self.content_number = len(objects) + 1
+        
+        prefix = [b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n']
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(sum(map(len, prefix)))
+            prefix.append(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+        self.prefix = b''.join(prefix)
+        offsets.append(len(self.prefix))
+        self.xref = b'xref\n0 %d\n0000000000 65535 f \n%s' % (
+            len(offsets) + 1, b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        )
+    
+    @staticmethod
+    def values(data):
+        """Text of every variable field for serialized payslip data"""
+        employee = data['employee']
+        values = {
+            'name': employee['name'],
+            'employee_id': employee['employee_id'],
+            'department': employee['department'] or 'N/A',
+            'position': employee['position'] or 'N/A',
+            'period': f"{data['month']}/{data['year']}",
+            'generated': data['generated']
+        }
+        for key in ('basic_salary', 'total_allowances', 'gross_salary', 'total_deductions', 'tax', 'net_salary'):
+            values[key] = f'${data[key]:.2f}'
+        return values
+    
+    def render(self, data):
+        values = self.values(data)
+        ops = []
+        for op in self.program:
+            if isinstance(op, bytes):
+                ops.append(op)
+                continue
+            key, x, y, font, size, align_right = op
+            text = str(values[key])
+            if align_right:
+                x -= self.string_width(text, font, size)
+            ops.append(_text_op(x, y, _pdf_string(text), self.FONTS[font], size) + b'\n')
+        content = zlib.compress(b''.join(ops))
+        
+        stream = b'%d 0 obj\n<< /Filter /FlateDecode /Length %d >>\nstream\n%s\nendstream\nendobj\n' % (
+            self.content_number, len(content), content
+        )
+        # Same content, same document id: re-renders stay byte-identical
+        document_id = hashlib.md5(content).hexdigest().encode('ascii')
+        trailer = b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R /ID [<%s> <%s>] >>\nstartxref\n%d\n%%%%EOF\n' % (
+            self.content_number + 1, self.info_number, document_id, document_id, len(self.prefix) + len(stream)
+        )
+        return b''.join([self.prefix, stream, self.xref, trailer])
+
+def _num(value):
+    """Format a PDF number with at most three decimals"""
+    return f'{value:.3f}'.rstrip('0').rstrip('.') or '0'
+
+def _pdf_string(text):
+    """Encode text as a PDF literal string body for the WinAnsi standard fonts
+    
+    Raises UnicodeEncodeError for characters the standard fonts cannot show,
+    which sends render_payslip to the Platypus fallback.
+    """
+    return text.encode('cp1252').replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+def _text_op(x, y, text, font, size):
+    return b'BT /%s %d Tf %s %s Td (%s) Tj ET' % (
+        font.encode('ascii'), size, _num(x).encode('ascii'), _num(y).encode('ascii'), text
+    )
+
+@lru_cache(maxsize=None)
+def _payslip_template():
+    return _PayslipTemplate()
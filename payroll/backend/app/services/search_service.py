@@ -0,0 +1,156 @@
+import re
+import threading
+from sqlalchemy import case, func, text
+from app import db
+from app.models import Employee
+
+# Fields covered by employee search (and by the MySQL FULLTEXT index)
+SEARCH_FIELDS = ('name', 'email', 'employee_id', 'position')
+
+# Best matches handed back to SQL by the in-process index; searches matching
+# more records are reported as truncated
+SEARCH_MAX_CANDIDATES = 1000
+
+# Share of the query's trigrams a record must contain to count as a match
+TRIGRAM_MIN_SCORE = 0.6
+
+_WORD_RE = re.compile(r'[0-9a-z]+')
+
+class EmployeeSearch:
+    """Indexed, relevance-ranked employee search
+    
+    MySQL uses the FULLTEXT index over SEARCH_FIELDS in boolean mode. Other
+    backends (SQLite in development) use an in-process trigram index that is
+    rebuilt whenever the employees table changes.
+    """
+    
+    @staticmethod
+    def apply(query, term):
+        """Filter an Employee query by a search term
+        
+        Returns the filtered query, an ORDER BY clause ranking results by
+        relevance and whether the matches were cut to SEARCH_MAX_CANDIDATES
+        (counts over the query then cover only the best matches); other
+        filters on the query still compose with the search.
+        """
+        if db.engine.dialect.name == 'mysql':
+            return EmployeeSearch._apply_fulltext(query, term)
+        return EmployeeSearch._apply_trigram(query, term)
+    
+    @staticmethod
+    def warm_up():
+        """Build the trigram index ahead of the first search (nothing to do on MySQL)"""
+        if db.engine.dialect.name != 'mysql':
+            _trigram_index.search('warmup')
+    
+    @staticmethod
+    def _apply_fulltext(query, term):
+        words = _WORD_RE.findall(term.lower())
+        if not words:
+            return query.filter(db.false()), None, False
+        
+        # Every word must match as a prefix: "+jo* +smi*"
+        boolean_query = ' '.join(f'+{word}*' for word in words)
+        columns = ', '.join(f'employees.{field}' for field in SEARCH_FIELDS)
+        match = text(f'MATCH ({columns}) AGAINST (:search_terms IN BOOLEAN MODE)').bindparams(
+            search_terms=boolean_query
+        )
+        ranking = text(f'MATCH ({columns}) AGAINST (:search_rank IN BOOLEAN MODE) DESC').bindparams(
+            search_rank=boolean_query
+        )
+        return query.filter(match), ranking, False
+    
+    @staticmethod
+    def _apply_trigram(query, term):
+        ranked_ids = _trigram_index.search(term, limit=SEARCH_MAX_CANDIDATES + 1)
+        if not ranked_ids:
+            return query.filter(db.false()), None, False
+        truncated = len(ranked_ids) > SEARCH_MAX_CANDIDATES
+        ranked_ids = ranked_ids[:SEARCH_MAX_CANDIDATES]
+        ranking = case({employee_id: rank for rank, employee_id in enumerate(ranked_ids)}, value=Employee.id)
+        return query.filter(Employee.id.in_(ranked_ids)), ranking, truncated
+
+class TrigramIndex:
+    """In-process trigram index over the searchable employee fields"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self._postings = {}
+        self._words = {}
+    
+    def search(self, term, limit=SEARCH_MAX_CANDIDATES):
+        """Return employee ids matching the term, best first"""
+        words = _WORD_RE.findall(term.lower())
+        if not words:
+            return []
+        self._refresh()
+        
+        query_grams = set()
+        for word in words:
+            query_grams |= _query_trigrams(word)
+        
+        counts = {}
+        for gram in query_grams:
+            for employee_id in self._postings.get(gram, ()):
+                counts[employee_id] = counts.get(employee_id, 0) + 1
+        
+        scored = []
+        for employee_id, count in counts.items():
+            score = count / len(query_grams)
+            if score < TRIGRAM_MIN_SCORE:
+                continue
+            # Whole-word and prefix hits rank above fuzzy trigram overlap
+            record_words = self._words[employee_id]
+            for word in words:
+                if word in record_words:
+                    score += 1.0
+                elif any(w.startswith(word) for w in record_words):
+                    score += 0.5
+            scored.append((-score, employee_id))
+        
+        scored.sort()
+        return [employee_id for _, employee_id in scored[:limit]]
+    
+    def _refresh(self):
+        # Cheap change detector so writes from any worker are picked up
+        signature = tuple(db.session.query(
+            func.count(Employee.id), func.max(Employee.id), func.max(Employee.updated_at)
+        ).one())
+        if signature == self._signature:
+            return
+        
+        with self._lock:
+            if signature == self._signature:
+                return
+            postings = {}
+            words_by_id = {}
+            rows = db.session.query(Employee.id, *[getattr(Employee, f) for f in SEARCH_FIELDS])
+            for row in rows:
+                words = set()
+                for value in row[1:]:
+                    if value:
+                        words.update(_WORD_RE.findall(value.lower()))
+                words_by_id[row.id] = words
+                grams = set()
+                for word in words:
+                    grams |= _word_trigrams(word)
+                for gram in grams:
+                    postings.setdefault(gram, set()).add(row.id)
+            self._postings = postings
+            self._words = words_by_id
+            self._signature = signature
+
+def _word_trigrams(word):
+    # Leading padding marks word starts so short prefixes can still match
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _query_trigrams(word):
+    if len(word) < 3:
+        # Too short for inner trigrams: match as a word prefix
+        padded = f'  {word}'
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+_trigram_index = TrigramIndex()
@@ -0,0 +1,357 @@
+import random
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import delete, func, text
+from app import db
+from app.models import (
+    User, Employee, Salary, Allowance, Deduction, PayrollRun, Payslip, PayslipDetail, PayrollRollup
+)
+from app.services.payroll_service import PayrollService
+from app.services.analytics_service import AnalyticsService
+
+DEPARTMENTS = {
+    'Engineering': ['Software Engineer', 'Senior Engineer', 'Engineering Manager'],
+    'Sales': ['Sales Representative', 'Account Executive', 'Sales Manager'],
+    'Finance': ['Accountant', 'Financial Analyst', 'Finance Manager'],
+    'HR': ['HR Assistant', 'HR Generalist', 'HR Manager'],
+    'Operations': ['Operations Associate', 'Logistics Coordinator', 'Operations Manager'],
+    'Support': ['Support Agent', 'Support Specialist', 'Support Lead'],
+    'Marketing': ['Marketing Coordinator', 'Content Strategist', 'Marketing Manager']
+}
+EMPLOYMENT_TYPES = (('Full-time', 70), ('Part-time', 12), ('Contract', 10), ('Temporary', 5), ('Intern', 3))
+GENDERS = ('Male', 'Female', 'Other')
+MARITAL_STATUSES = ('Single', 'Married', 'Divorced', 'Widowed', 'Separated')
+FIRST_NAMES = (
+    'James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen'
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin'
+)
+BASE_SALARIES = (800, 1200, 1800, 2500, 3200, 4000, 5000, 6500, 8000, 11000)
+
+# (type, probability, amount range) for allowances and deductions
+ALLOWANCE_PLANS = (('Housing', 0.5, (300, 900)), ('Transport', 0.45, (80, 250)),
+                   ('Meal', 0.3, (50, 150)), ('Phone', 0.2, (20, 60)))
+DEDUCTION_PLANS = (('Pension', 0.7, (50, 400)), ('Health Insurance', 0.5, (60, 200)),
+                   ('Loan Repayment', 0.12, (100, 500)))
+
+# Tables cleared by a reset, children first
+SEED_TABLES = (PayslipDetail, Payslip, PayrollRun, PayrollRollup, Allowance, Deduction, Salary, Employee)
+
+SEED_USERS = (('admin@payroll.com', 'admin'), ('finance@payroll.com', 'finance'))
+
+class SeedService:
+    """Generate realistic, deterministic datasets of any size
+    
+    Everything is generated in memory from a seeded RNG and written with chunked
+    executemany inserts using explicit primary keys, so no rows are read back.
+    Historical payslips are computed with the same cohort engine that
+    processes payroll runs, and the analytics rollup is rebuilt at the end.
+    """
+    
+    @staticmethod
+    def seed(employees, months=12, seed=0, end=None, password='password123', reset=False,
+             chunk_size=5000, progress=None):
+        """Seed ``employees`` employees and ``months`` months of processed payroll ending at ``end``
+        
+        ``end`` is a (year, month) tuple and defaults to last month; output is
+        identical for the same seed and end period. Returns row counts per table.
+        """
+        progress = progress or (lambda message: None)
+        end = end or SeedService._previous_month(date.today())
+        
+        existing = db.session.query(func.count(Employee.id)).scalar()
+        if existing and not reset:
+            raise ValueError(f'Database already has {existing} employees; reset it first')
+        if reset:
+            for model in SEED_TABLES:
+                db.session.execute(delete(model))
+            db.session.commit()
+            progress('Cleared existing employee and payroll data')
+        
+        admin_id = SeedService._ensure_users(password)
+        periods = SeedService._periods(end, months)
+        window_end = date(end[0], end[1], 28)
+        window_start = date(periods[0][0], periods[0][1], 1) if periods else window_end
+        
+        rnd = random.Random(seed)
+        people = [
+            SeedService._generate_employee(rnd, i, window_start, window_end)
+            for i in range(1, employees + 1)
+        ]
+        
+        writer = _ChunkWriter(chunk_size)
+        counts = {}
+        counts['employees'] = writer.write(Employee, (p['employee'] for p in people))
+        
+        ids = {'salary': 0, 'allowance': 0, 'deduction': 0}
+        for person in people:
+            for key, records in (('salary', person['salaries']), ('allowance', person['allowances']),
+                                 ('deduction', person['deductions'])):
+                for record in records:
+                    ids[key] += 1
+                    record['id'] = ids[key]
+        counts['salaries'] = writer.write(Salary, (s for p in people for s in p['salaries']))
+        counts['allowances'] = writer.write(Allowance, (a for p in people for a in p['allowances']))
+        counts['deductions'] = writer.write(Deduction, (d for p in people for d in p['deductions']))
+        db.session.commit()
+        progress(f"Inserted {counts['employees']} employees, {counts['salaries']} salaries, "
+                 f"{counts['allowances']} allowances, {counts['deductions']} deductions")
+        
+        counts.update(payroll_runs=0, payslips=0, payslip_details=0)
+        for year, month in periods:
+            run_count, detail_count = SeedService._seed_period(writer, people, year, month, admin_id, counts)
+            db.session.commit()
+            progress(f'{year}-{month:02d}: {run_count} payslips, {detail_count} details')
+        
+        counts['payroll_rollups'] = AnalyticsService.rebuild_rollup()
+        SeedService._sync_sequences()
+        db.session.commit()
+        
+        from app.cache import analytics_cache, facet_cache
+        analytics_cache.clear()
+        facet_cache.clear()
+        return counts
+    
+    @staticmethod
+    def _seed_period(writer, people, year, month, admin_id, counts):
+        """Write processed runs, payslips and details for every employee paid in one month"""
+        period_start = date(year, month, 1)
+        period_end = date(year, month, 28)
+        created_at = datetime(year, month, 25, 9, 0)
+        
+        paid = []
+        for person in people:
+            salary = None
+            for s in reversed(person['salaries']):
+                if s['start_date'] <= period_start and (s['end_date'] is None or s['end_date'] >= period_start):
+                    salary = s
+                    break
+            if salary is None:
+                continue
+            allowances = [a for a in person['allowances'] if _overlaps(a, period_start, period_end)]
+            deductions = [d for d in person['deductions'] if _overlaps(d, period_start, period_end)]
+            paid.append((person['employee']['id'], salary['basic_salary'], allowances, deductions))
+        if not paid:
+            return 0, 0
+        
+        basic = np.array([p[1] for p in paid], dtype=float)
+        total_allowances = np.array([sum(a['amount'] for a in p[2]) for p in paid], dtype=float)
+        total_deductions = np.array([sum(d['amount'] for d in p[3]) for p in paid], dtype=float)
+        cohort = PayrollService.compute_cohort(basic, total_allowances, total_deductions)
+        
+        runs, payslips, details = [], [], []
+        columns = zip(
+            basic.tolist(), total_allowances.tolist(), total_deductions.tolist(),
+            cohort['gross_salary'].tolist(), cohort['tax'].tolist(), cohort['net_salary'].tolist()
+        )
+        for (employee_id, _, allowances, deductions), figures in zip(paid, columns):
+            basic_salary, allowances_total, deductions_total, gross, tax, net = figures
+            counts['payroll_runs'] += 1
+            counts['payslips'] += 1
+            run_id = payslip_id = counts['payslips']
+            runs.append({
+                'id': run_id,
+                'employee_id': employee_id,
+                'month': month,
+                'year': year,
+                'basic_salary': basic_salary,
+                'deductions': 0.0,
+                'net_salary': basic_salary,
+                'status': 'processed',
+                'created_by': admin_id,
+                'created_at': created_at,
+                'updated_at': created_at
+            })
+            payslips.append({
+                'id': payslip_id,
+                'payroll_run_id': run_id,
+                'employee_id': employee_id,
+                'basic_salary': basic_salary,
+                'total_allowances': allowances_total,
+                'total_deductions': deductions_total,
+                'gross_salary': gross,
+                'tax': tax,
+                'net_salary': net,
+                'payment_status': 'paid',
+                'payment_date': period_end,
+                'created_at': created_at,
+                'updated_at': created_at
+            })
+            calc = {
+                'tax': tax,
+                'allowances_detail': [{'type': a['allowance_type'], 'amount': a['amount']} for a in allowances],
+                'deductions_detail': [{'type': d['deduction_type'], 'amount': d['amount']} for d in deductions]
+            }
+            for row in PayrollService.payslip_detail_rows(payslip_id, calc):
+                counts['payslip_details'] += 1
+                row['id'] = counts['payslip_details']
+                row['created_at'] = created_at
+                details.append(row)
+        
+        writer.write(PayrollRun, runs)
+        writer.write(Payslip, payslips)
+        writer.write(PayslipDetail, details)
+        return len(payslips), len(details)
+    
+    @staticmethod
+    def _generate_employee(rnd, i, window_start, window_end):
+        """Generate one employee with salary history, allowances and deductions"""
+        first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+        department = rnd.choice(list(DEPARTMENTS))
+        hire_date = window_end - timedelta(days=rnd.randint(30, 3650 + (window_end - window_start).days))
+        
+        # A few employees left the company at some point
+        termination = None
+        if rnd.random() < 0.05:
+            termination = hire_date + timedelta(days=rnd.randint(180, 1800))
+            if termination >= window_end:
+                termination = None
+        last_day = termination or window_end
+        
+        # Salary history: a raise roughly every year, each record ending the day before the next
+        salaries = []
+        start, amount = hire_date, float(rnd.choice(BASE_SALARIES))
+        while True:
+            change = start + timedelta(days=rnd.randint(300, 500))
+            if change > last_day or len(salaries) == 5:
+                salaries.append(_salary_record(i, amount, start, termination))
+                break
+            salaries.append(_salary_record(i, amount, start, change - timedelta(days=1)))
+            start, amount = change, round(amount * rnd.uniform(1.02, 1.12), 2)
+        
+        allowances = []
+        for allowance_type, probability, (low, high) in ALLOWANCE_PLANS:
+            if rnd.random() >= probability:
+                continue
+            start = hire_date + timedelta(days=rnd.choice((0, 0, rnd.randint(30, 720))))
+            if start > last_day:
+                continue
+            amount = float(rnd.randint(low, high))
+            if rnd.random() < 0.3:
+                # Revised allowance whose new record overlaps the old one by a few weeks
+                revised = start + timedelta(days=rnd.randint(120, 900))
+                if revised < last_day:
+                    overlap_end = min(revised + timedelta(days=rnd.randint(0, 31)), last_day)
+                    allowances.append(_period_record(i, 'allowance_type', allowance_type, amount, start,
+                                                     overlap_end))
+                    start, amount = revised, float(rnd.randint(low, high))
+            allowances.append(_period_record(i, 'allowance_type', allowance_type, amount, start, termination))
+        
+        deductions = []
+        for deduction_type, probability, (low, high) in DEDUCTION_PLANS:
+            if rnd.random() >= probability:
+                continue
+            start = hire_date + timedelta(days=rnd.choice((0, rnd.randint(0, 900))))
+            if start > last_day:
+                continue
+            end = termination
+            if deduction_type == 'Loan Repayment':
+                end = start + timedelta(days=rnd.randint(365, 1095))
+                end = min(end, termination) if termination else end
+            deductions.append(_period_record(i, 'deduction_type', deduction_type,
+                                             float(rnd.randint(low, high)), start, end))
+        
+        created_at = datetime.combine(hire_date, datetime.min.time())
+        employee = {
+            'id': i,
+            'name': f'{first} {last}',
+            'email': f'{first.lower()}.{last.lower()}.{i}@company.com',
+            'phone': f'555-{rnd.randint(0, 9999):04d}',
+            'department': department,
+            'position': rnd.choice(DEPARTMENTS[department]),
+            'bank_account': f'{rnd.randint(10 ** 9, 10 ** 10 - 1)}',
+            'bank_name': rnd.choice(('First National', 'City Bank', 'Union Bank')),
+            'employee_id': f'EMP{i:06d}',
+            'hire_date': hire_date,
+            'is_active': termination is None,
+            'date_of_birth': hire_date - timedelta(days=rnd.randint(20 * 365, 45 * 365)),
+            'gender': rnd.choice(GENDERS),
+            'marital_status': rnd.choice(MARITAL_STATUSES),
+            'employment_type': rnd.choices(
+                [t for t, _ in EMPLOYMENT_TYPES], weights=[w for _, w in EMPLOYMENT_TYPES]
+            )[0],
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+        return {'employee': employee, 'salaries': salaries, 'allowances': allowances, 'deductions': deductions}
+    
+    @staticmethod
+    def _ensure_users(password):
+        """Create the admin and finance logins if missing; returns the admin user id"""
+        admin_id = None
+        for email, role in SEED_USERS:
+            user = User.query.filter_by(email=email).first()
+            if not user:
+                user = User(email=email, role=role)
+                user.set_password(password)
+                db.session.add(user)
+                db.session.flush()
+            if role == 'admin':
+                admin_id = user.id
+        db.session.commit()
+        return admin_id
+    
+    @staticmethod
+    def _periods(end, months):
+        """(year, month) pairs of the ``months`` months ending at ``end``, oldest first"""
+        year, month = end
+        periods = []
+        for _ in range(months):
+            periods.append((year, month))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        return periods[::-1]
+    
+    @staticmethod
+    def _previous_month(today):
+        return (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+    
+    @staticmethod
+    def _sync_sequences():
+        """Explicit ids bypass PostgreSQL sequences, so move them past the seeded rows"""
+        if db.engine.dialect.name != 'postgresql':
+            return
+        for model in SEED_TABLES:
+            table = model.__tablename__
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            ))
+
+
+class _ChunkWriter:
+    """Writes dict rows with executemany in fixed-size chunks"""
+    
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+    
+    def write(self, model, rows):
+        statement = model.__table__.insert()
+        written = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == self.chunk_size:
+                db.session.execute(statement, chunk)
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            db.session.execute(statement, chunk)
+            written += len(chunk)
+        return written
+
+
+def _salary_record(employee_id, amount, start, end):
+    created_at = datetime.combine(start, datetime.min.time())
+    return {'employee_id': employee_id, 'basic_salary': amount, 'start_date': start, 'end_date': end,
+            'currency': 'USD', 'created_at': created_at, 'updated_at': created_at}
+
+def _period_record(employee_id, type_key, type_value, amount, start, end):
+    created_at = datetime.combine(start, datetime.min.time())
+    return {'employee_id': employee_id, type_key: type_value, 'amount': amount, 'is_fixed': True,
+            'start_date': start, 'end_date': end, 'created_at': created_at, 'updated_at': created_at}
+
+def _overlaps(record, period_start, period_end):
+    return record['start_date'] <= period_end and (record['end_date'] is None or record['end_date'] >= period_start)
@@ -0,0 +1,73 @@
+"""Startup cost report behind ``flask startup-profile``
+
+Imports are cached per process, so the app is built in a fresh interpreter
+started with ``-X importtime``; its import log is aggregated by top-level
+package.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Optional dependencies that should only load when a feature needs them
+HEAVY_MODULES = ('reportlab', 'numpy', 'redis', 'PyPDF2')
+
+_CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app(sys.argv[1])
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'modules': len(sys.modules)
+}))
+'''
+
+def _parse_importtime(lines):
+    """Per-module (self_us, cumulative_us) from ``-X importtime`` output"""
+    modules = {}
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the column header
+        modules[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return modules
+
+def profile_startup(config_name):
+    """Build the app in a child interpreter and return its timings
+    
+    Returns a dict with ``import_ms``, ``create_app_ms``, ``modules`` (count),
+    ``packages`` (top-level package -> self ms and module count, slowest
+    first), ``app_modules`` (this app's modules -> cumulative ms) and the
+    HEAVY_MODULES that were loaded.
+    """
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD, config_name],
+        cwd=backend_dir, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'startup failed')
+    
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    modules = _parse_importtime(proc.stderr.splitlines())
+    
+    packages = defaultdict(lambda: {'ms': 0.0, 'modules': 0})
+    for name, (self_us, _) in modules.items():
+        package = packages[name.split('.', 1)[0]]
+        package['ms'] += self_us / 1000
+        package['modules'] += 1
+    report['packages'] = sorted(packages.items(), key=lambda item: -item[1]['ms'])
+    report['app_modules'] = sorted(
+        ((name, cumulative / 1000) for name, (_, cumulative) in modules.items()
+         if name == 'app' or name.startswith('app.')),
+        key=lambda item: -item[1]
+    )
+    report['heavy_modules'] = [name for name in HEAVY_MODULES if name in modules]
+    return report
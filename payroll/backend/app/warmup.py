@@ -0,0 +1,81 @@
+"""Work done once per server process before it takes traffic
+
+With a preloading server (gunicorn.conf.py) this runs in the master, so the
+imported modules, compiled templates and primed caches are shared by every
+forked worker copy-on-write.
+"""
+import logging
+import time
+from app import db
+
+logger = logging.getLogger(__name__)
+
+WARMUP_STEPS = {}
+
+def warmup_step(name):
+    """Register a function as a named warmup step (selected by the WARMUP setting)"""
+    def decorator(fn):
+        WARMUP_STEPS[name] = fn
+        return fn
+    return decorator
+
+@warmup_step('tax_tables')
+def _tax_tables():
+    # Importing the service builds the NumPy tax bracket arrays
+    import numpy as np
+    from app.services.payroll_service import PayrollService
+    
+    PayrollService.compute_cohort(np.zeros(1), np.zeros(1), np.zeros(1))
+
+@warmup_step('pdf_template')
+def _pdf_template():
+    from app.services.pdf_service import PDFService
+    PDFService.warm_up()
+
+@warmup_step('employee_facets')
+def _employee_facets():
+    from app.models import Employee
+    from app.services.facet_service import EmployeeFacets
+    
+    # Same criterion and cache key as GET /api/employees without filters
+    filters = {
+        'search': '', 'department': '', 'employment_type': '', 'gender': '',
+        'hire_date_from': None, 'hire_date_to': None
+    }
+    criterion = Employee.query.filter_by(is_active=True).whereclause
+    EmployeeFacets.compute(criterion, filters, facets=['department', 'employment_type'])
+
+@warmup_step('employee_search')
+def _employee_search():
+    from app.services.search_service import EmployeeSearch
+    EmployeeSearch.warm_up()
+
+def warm_up(app):
+    """Run the WARMUP steps, then close pooled connections so none are shared across a fork
+    
+    A failing step is logged and skipped; the server still starts. Returns
+    {step: seconds} for the steps that ran.
+    """
+    names = [name.strip() for name in app.config.get('WARMUP', '').split(',') if name.strip()]
+    timings = {}
+    with app.app_context():
+        for name in names:
+            step = WARMUP_STEPS.get(name)
+            if step is None:
+                logger.warning('Unknown warmup step %r', name)
+                continue
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                db.session.rollback()
+                logger.exception('Warmup step %s failed', name)
+                continue
+            timings[name] = time.perf_counter() - started
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    
+    logger.info('Warmed up in %.2fs (%s)', sum(timings.values()),
+                ', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items()) or 'no steps')
+    return timings
@@ -0,0 +1,71 @@
+"""Benchmark suite entry point
+
+    python -m benchmarks run --sizes 1000,10000 --output results.json
+    python -m benchmarks compare baseline.json results.json --threshold 0.2
+    python -m benchmarks pdf --count 200
+"""
+import argparse
+import json
+import sys
+
+def _run(args):
+    from benchmarks.runner import run_benchmarks
+    
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    only = set(args.only.split(',')) if args.only else None
+    document = run_benchmarks(sizes, repeat=args.repeat, seed=args.seed, only=only)
+    with open(args.output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f'Wrote {args.output}')
+    return 0
+
+def _compare(args):
+    from benchmarks.compare import compare_results, format_rows
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare_results(baseline, current, args.threshold, args.min_delta)
+    print(format_rows(rows))
+    regressions = [r for r in rows if r['regression']]
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) against {args.baseline}')
+        return 1
+    return 0
+
+def _pdf(args):
+    from benchmarks.pdf import run_pdf_benchmark
+    
+    run_pdf_benchmark(count=args.count, repeat=args.repeat)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Payroll performance benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run = commands.add_parser('run', help='Seed synthetic orgs and time the key paths')
+    run.add_argument('--sizes', default='1000,10000', help='Comma-separated employee counts')
+    run.add_argument('--repeat', type=int, default=3, help='Repetitions of each read-only case')
+    run.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+    run.add_argument('--only', help='Comma-separated case names to time')
+    run.add_argument('--output', default='benchmark-results.json')
+    run.set_defaults(handler=_run)
+    
+    compare = commands.add_parser('compare', help='Flag regressions against a baseline')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.2, help='Allowed relative slowdown')
+    compare.add_argument('--min-delta', type=float, default=0.005, help='Ignore slowdowns below this many seconds')
+    compare.set_defaults(handler=_compare)
+    
+    pdf = commands.add_parser('pdf', help='Time one payslip render with each PDF renderer')
+    pdf.add_argument('--count', type=int, default=200, help='Payslips rendered per repetition')
+    pdf.add_argument('--repeat', type=int, default=3)
+    pdf.set_defaults(handler=_pdf)
+    
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Compare a benchmark result document against a stored baseline"""
+
+def compare_results(baseline, current, threshold=0.2, min_delta=0.005):
+    """Return one row per (size, case) present in both documents
+    
+    A case regresses when its median time grows by more than ``threshold``
+    (relative) and ``min_delta`` seconds (absolute, to ignore timer noise), or
+    when it issues more queries than the baseline.
+    """
+    rows = []
+    for size, cases in current['results'].items():
+        base_cases = baseline['results'].get(size, {})
+        for name, result in cases.items():
+            base = base_cases.get(name)
+            if base is None:
+                continue
+            delta = result['seconds'] - base['seconds']
+            ratio = result['seconds'] / base['seconds'] if base['seconds'] else None
+            slower = delta > min_delta and ratio is not None and ratio > 1 + threshold
+            more_queries = (
+                base.get('queries') is not None
+                and result.get('queries') is not None
+                and result['queries'] > base['queries']
+            )
+            rows.append({
+                'size': size,
+                'case': name,
+                'baseline': base['seconds'],
+                'current': result['seconds'],
+                'ratio': ratio,
+                'baseline_queries': base.get('queries'),
+                'queries': result.get('queries'),
+                'regression': slower or more_queries
+            })
+    return rows
+
+def format_rows(rows):
+    lines = [f'{"size":>8}  {"case":<26}{"baseline":>11}{"current":>11}{"ratio":>8}{"queries":>12}']
+    for row in rows:
+        ratio = f'{row["ratio"]:.2f}x' if row['ratio'] is not None else '-'
+        queries = f'{row["baseline_queries"]}->{row["queries"]}'
+        flag = '  REGRESSION' if row['regression'] else ''
+        lines.append(
+            f'{row["size"]:>8}  {row["case"]:<26}'
+            f'{row["baseline"] * 1000:>9.1f}ms{row["current"] * 1000:>9.1f}ms'
+            f'{ratio:>8}{queries:>12}{flag}'
+        )
+    return '\n'.join(lines)
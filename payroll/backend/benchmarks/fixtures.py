@@ -0,0 +1,12 @@
+"""Synthetic organisation fixtures for the benchmark suite"""
+from app.models import User
+from app.services.seed_service import SeedService, SEED_USERS
+
+# Months of processed payroll history seeded before the benchmarked month
+HISTORY_MONTHS = 3
+
+def seed_org(employee_count, seed=0, months=HISTORY_MONTHS):
+    """Replace the database contents with a synthetic organisation of ``employee_count``
+    employees and ``months`` months of payroll history. Returns the admin user id."""
+    SeedService.seed(employee_count, months=months, seed=seed, reset=True)
+    return User.query.filter_by(email=SEED_USERS[0][0]).one().id
@@ -0,0 +1,45 @@
+"""Microbenchmark: per-payslip render time of the compiled template vs Platypus"""
+import statistics
+import time
+
+SAMPLE_PAYSLIP = {
+    'payslip_id': 1,
+    'employee': {
+        'name': 'Jennifer Rodriguez',
+        'employee_id': 'EMP000001',
+        'department': 'Engineering',
+        'position': 'Senior Engineer'
+    },
+    'month': 6,
+    'year': 2025,
+    'generated': '2025-06-28',
+    'basic_salary': 6500.0,
+    'total_allowances': 1140.0,
+    'gross_salary': 7640.0,
+    'total_deductions': 520.0,
+    'tax': 1028.0,
+    'net_salary': 6092.0
+}
+
+def time_renderer(render, count, repeat):
+    """Median seconds per payslip over ``repeat`` runs of ``count`` renders (after one warm-up)"""
+    render(SAMPLE_PAYSLIP)
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for i in range(count):
+            render(dict(SAMPLE_PAYSLIP, payslip_id=i, net_salary=SAMPLE_PAYSLIP['net_salary'] + i))
+        runs.append((time.perf_counter() - started) / count)
+    return statistics.median(runs)
+
+def run_pdf_benchmark(count=200, repeat=3, log=print):
+    from app.services.pdf_service import PDFService
+    
+    results = {
+        'template': time_renderer(PDFService.render_payslip, count, repeat),
+        'platypus': time_renderer(PDFService.render_payslip_platypus, count, repeat)
+    }
+    for name, seconds in results.items():
+        log(f'{name:<10}{seconds * 1000:>8.3f} ms/payslip')
+    log(f'speedup   {results["platypus"] / results["template"]:>8.1f}x')
+    return results
@@ -0,0 +1,141 @@
+"""Time the key payroll paths against synthetic organisations of several sizes"""
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timezone
+
+# Number of payslips rendered for the PDF case (rendering is linear in this)
+PDF_SAMPLE_SIZE = 50
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _measure(fn, repeat):
+    """Run fn ``repeat`` times; report the median and best wall time and the query count"""
+    from app.profiling import collect_queries
+    
+    timings, queries, items = [], None, None
+    for _ in range(repeat):
+        with collect_queries() as stats:
+            started = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - started)
+        queries = stats.count
+        items = result if isinstance(result, int) else items
+    return {
+        'seconds': round(statistics.median(timings), 6),
+        'best': round(min(timings), 6),
+        'repeat': repeat,
+        'queries': queries,
+        'items': items
+    }
+
+def _cases(client, headers, admin_id, size, month, year):
+    """Benchmark cases in execution order: (name, fn, repeatable)"""
+    from app import db
+    from app.cache import analytics_cache
+    from app.models import Payslip
+    from app.services import PayrollService, PDFService
+    
+    def create_runs():
+        result = PayrollService.create_bulk_payroll_runs(month, year, 0, admin_id)
+        return result['success_count']
+    
+    def process_runs():
+        run_ids = PayrollService.find_draft_runs(month, year)
+        return PayrollService.process_payroll_runs(month, year, run_ids)['payslip_count']
+    
+    def get(url):
+        def request():
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200, (url, response.status_code, response.get_data(as_text=True))
+            db.session.remove()
+        return request
+    
+    def analytics_cold():
+        analytics_cache.clear()
+        for endpoint in ('summary', 'department-distribution', 'monthly-trend'):
+            get(f'/api/analytics/{endpoint}?year={year}&month={month}')()
+    
+    def render_pdfs():
+        payslip_ids = [row.id for row in db.session.query(Payslip.id).order_by(Payslip.id).limit(PDF_SAMPLE_SIZE)]
+        sample = PDFService.load_payslip_data(payslip_ids=payslip_ids)
+        for data in sample:
+            PDFService.render_payslip(data)
+        return len(sample)
+    
+    middle_page = max(1, size // 200)
+    
+    return [
+        ('create_runs', create_runs, False),
+        ('process_runs', process_runs, False),
+        ('list_payslips', get('/api/payslips?per_page=100'), True),
+        ('list_payslips_deep_page', get(f'/api/payslips?per_page=100&page={middle_page}'), True),
+        ('list_payslips_cursor', get('/api/payslips?limit=100'), True),
+        ('list_employees', get('/api/employees?per_page=100'), True),
+        ('search_employees', get('/api/employees?search=smith'), True),
+        ('employee_options', get('/api/employees/options'), True),
+        ('analytics_cold', analytics_cold, True),
+        ('analytics_warm', get(f'/api/analytics/summary?year={year}&month={month}'), True),
+        ('render_pdfs', render_pdfs, True),
+    ]
+
+def run_benchmarks(sizes, repeat=3, seed=0, only=None, log=print):
+    """Seed each organisation size into a fresh schema and time every case
+    
+    The database comes from TestingConfig (TEST_DATABASE_URL, in-memory SQLite
+    by default). Returns a JSON-serializable result document.
+    """
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from benchmarks.fixtures import seed_org
+    
+    app = create_app('testing')
+    today = date.today()
+    results = {}
+    
+    with app.app_context():
+        for size in sizes:
+            db.drop_all()
+            db.create_all()
+            
+            started = time.perf_counter()
+            admin_id = seed_org(size, seed=seed)
+            log(f'[{size}] seeded in {time.perf_counter() - started:.2f}s')
+            
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin_id))}'}
+            client = app.test_client()
+            size_results = {}
+            for name, fn, repeatable in _cases(client, headers, admin_id, size, today.month, today.year):
+                if only and name not in only:
+                    # Non-repeatable cases set up data for later ones, so they always run
+                    if repeatable:
+                        continue
+                    fn()
+                    continue
+                size_results[name] = _measure(fn, repeat if repeatable else 1)
+                log(f'[{size}] {name}: {size_results[name]["seconds"] * 1000:.1f} ms, '
+                    f'{size_results[name]["queries"]} queries')
+            results[str(size)] = size_results
+            db.session.remove()
+    
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_revision': _git_revision(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'database': app.config['SQLALCHEMY_DATABASE_URI'].split('://')[0],
+            'seed': seed,
+            'repeat': repeat
+        },
+        'results': results
+    }
@@ -0,0 +1,56 @@
+"""Gunicorn settings for the API (gunicorn wsgi:app, or flask serve)
+
+The app is loaded and warmed up once in the master and workers are forked
+from it, sharing its memory copy-on-write. SIGHUP replaces the workers
+gracefully but, with preloading, keeps the master's code; to deploy new code
+send SIGUSR2 (starts a new master), then SIGTERM to the old one, or set
+WEB_PRELOAD=false so SIGHUP re-imports the app in each new worker.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('WEB_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# More than one thread per worker makes gunicorn use its threaded (gthread)
+# workers. Keep it above 1: sync workers do not heartbeat while a response is
+# being written, so streamed exports, ZIP archives, previews and a synchronous
+# /runs/process are killed once they run longer than the timeout
+threads = int(os.getenv('WEB_THREADS', 4))
+preload_app = os.getenv('WEB_PRELOAD', 'true').lower() in ('1', 'true')
+
+# gthread workers heartbeat from their main loop, so this only catches a hung
+# worker; long requests and streams are not cut off
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+# Seconds workers get to finish in-flight requests on reload or shutdown
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+# Recycle workers after this many requests (0 = never); jitter staggers restarts
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('WEB_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+def on_starting(server):
+    # Every worker would keep its own response cache and never see the other
+    # workers' invalidations (see app.cache.TaggedCache)
+    from config import config
+    settings = config[os.getenv('FLASK_ENV', 'production')]
+    if server.cfg.workers > 1 and settings.CACHE_BACKEND == 'memory':
+        raise RuntimeError(
+            f'CACHE_BACKEND=memory cannot be used with {server.cfg.workers} workers; '
+            'set CACHE_BACKEND=redis (or none to disable caching)'
+        )
+
+def when_ready(server):
+    # Runs in the master after preloading, before the first fork. Moving the
+    # loaded objects out of the collector's reach keeps collections in the
+    # workers from touching (and so copying) the shared pages.
+    if preload_app:
+        gc.freeze()
+    server.log.info('Serving with %s workers x %s threads', server.cfg.workers, server.cfg.threads)
+
+def post_fork(server, worker):
+    from app.log import restart_listener
+    restart_listener()
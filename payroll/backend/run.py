@@ -1,9 +1,11 @@
-from app import create_app, db
+from app import create_app
+from app.schema import check_schema
 import os
 
 app = create_app(os.getenv('FLASK_ENV', 'development'))
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        # Warn instead of create_all; flask schema init sets up a fresh database
+        check_schema()
     app.run(debug=True, port=5000)
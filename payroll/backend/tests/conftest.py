@@ -0,0 +1,42 @@
+"""Shared fixtures: the app on an in-memory SQLite database with a small seeded organisation"""
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import User
+from app.services.seed_service import SeedService, SEED_USERS
+
+# Employees and months of processed payroll seeded for every test app
+SEED_EMPLOYEES = 20
+SEED_MONTHS = 2
+
+@pytest.fixture
+def app(request):
+    """The seeded app; parametrize it indirectly with an employee count to resize the organisation"""
+    # No app context is held open between requests: each test client request
+    # pushes its own, so ``g`` does not leak from one request into the next
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        SeedService.seed(getattr(request, 'param', SEED_EMPLOYEES), months=SEED_MONTHS, seed=1)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def auth_headers(app, email):
+    """Bearer token headers for the seeded login with this email"""
+    with app.app_context():
+        user_id = User.query.filter_by(email=email).one().id
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+@pytest.fixture
+def admin_headers(app):
+    return auth_headers(app, SEED_USERS[0][0])
+
+@pytest.fixture
+def finance_headers(app):
+    return auth_headers(app, SEED_USERS[1][0])
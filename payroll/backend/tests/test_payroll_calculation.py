@@ -0,0 +1,63 @@
+"""The vectorized cohort path must match calculate_payroll exactly, including at tax bracket edges"""
+import numpy as np
+import pytest
+from app import db
+from app.models import Employee
+from app.services.payroll_service import PayrollService, TAX_BRACKETS
+
+# A seeded payroll month
+PERIOD = (9, 2026)
+
+def _edge_gross_values():
+    values = [0.0, 0.01, 1_000_000.0]
+    for upper, _, _, _ in TAX_BRACKETS[:-1]:
+        edge = float(upper)
+        values += [
+            edge - 0.01, np.nextafter(edge, 0.0), edge,
+            np.nextafter(edge, np.inf), edge + 0.01
+        ]
+    return values
+
+EDGE_GROSS = _edge_gross_values()
+
+@pytest.mark.parametrize('gross', EDGE_GROSS)
+def test_tax_vector_matches_scalar_at_bracket_edges(gross):
+    vector = PayrollService._calculate_tax_vector(np.array([gross]))
+    assert vector[0] == PayrollService._calculate_tax(gross)
+
+def test_compute_cohort_matches_scalar_formula():
+    gross = np.array(EDGE_GROSS)
+    allowances = np.full_like(gross, 125.5)
+    deductions = np.full_like(gross, 80.25)
+    cohort = PayrollService.compute_cohort(gross - allowances, allowances, deductions)
+    for i, (basic, allowance, deduction) in enumerate(zip(gross - allowances, allowances, deductions)):
+        expected_gross = basic + allowance
+        expected_tax = PayrollService._calculate_tax(expected_gross)
+        assert cohort['gross_salary'][i] == expected_gross
+        assert cohort['tax'][i] == expected_tax
+        assert cohort['net_salary'][i] == expected_gross - deduction - expected_tax
+
+def test_calculate_cohort_matches_calculate_payroll(app):
+    month, year = PERIOD
+    with app.app_context():
+        employee_ids = [row.id for row in db.session.query(Employee.id).order_by(Employee.id)]
+        
+        # Put each employee's gross pay on or next to a bracket edge
+        for i, employee_id in enumerate(employee_ids):
+            salary = PayrollService._get_active_salary(employee_id, month, year)
+            if salary is None:
+                continue
+            allowances = PayrollService.calculate_payroll(employee_id, month, year)['total_allowances']
+            salary.basic_salary = EDGE_GROSS[i % len(EDGE_GROSS)] - allowances
+        db.session.commit()
+        
+        cohort = PayrollService.calculate_cohort(employee_ids, month, year)
+        vector = {row['employee_id']: row for row in PayrollService.iter_cohort_results(cohort)}
+        
+        assert vector
+        for employee_id in employee_ids:
+            scalar = PayrollService.calculate_payroll(employee_id, month, year)
+            if 'error' in scalar:
+                assert employee_id not in vector
+            else:
+                assert vector[employee_id] == scalar
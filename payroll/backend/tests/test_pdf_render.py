@@ -0,0 +1,53 @@
+"""Pooled payslip rendering (PDFService.render_payslips, PDFCache.render_month)"""
+import zipfile
+from app import db
+from app.profiling import assert_max_queries
+from app.services.pdf_cache import PDFCache
+from app.services.pdf_service import PDFService
+
+# A seeded payroll month
+PERIOD = (9, 2026)
+
+def test_render_month_to_archive(app, tmp_path):
+    month, year = PERIOD
+    output = str(tmp_path / 'payslips.zip')
+    with app.app_context():
+        total = PDFService.count_payslips(month, year)
+        report = PDFService.render_payslips(output, month=month, year=year, workers=2)
+    
+    assert total > 0
+    assert (report['rendered'], report['failed']) == (total, 0)
+    with zipfile.ZipFile(output) as archive:
+        names = archive.namelist()
+        assert len(names) == total
+        assert archive.read(names[0]).startswith(b'%PDF')
+
+def test_render_payslip_ids_to_directory(app, tmp_path):
+    with app.app_context():
+        report = PDFService.render_payslips(str(tmp_path), payslip_ids=[1, 2], workers=1)
+    assert [f['payslip_id'] for f in report['files']] == [1, 2]
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f['filename'] for f in report['files'])
+
+def test_render_month_fills_cache_once(app, tmp_path):
+    month, year = PERIOD
+    app.config['PDF_CACHE_DIR'] = str(tmp_path)
+    calls = []
+    with app.app_context():
+        first = PDFCache.render_month(month, year, chunk_size=5, workers=2,
+                                      progress=lambda done, total: calls.append((done, total)))
+        second = PDFCache.render_month(month, year)
+    
+    total = first['rendered_count']
+    assert total > 0 and first['failed_count'] == 0
+    assert second == {'rendered_count': 0, 'cached_count': total, 'failed_count': 0}
+    assert calls[-1] == (total, total)
+
+def test_iter_payslip_data_allows_commits_between_batches(app):
+    month, year = PERIOD
+    with app.app_context():
+        total = PDFService.count_payslips(month, year)
+        # One query per batch of 5 plus the empty batch that ends the scan,
+        # however often the caller commits
+        with assert_max_queries(-(-total // 5) + 1):
+            for data in PDFService.iter_payslip_data(month, year, batch_size=5):
+                db.session.commit()
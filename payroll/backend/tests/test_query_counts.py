@@ -0,0 +1,67 @@
+"""Query budgets of the list, payslip, preview and month-wide payroll endpoints
+
+Every budget is checked against a small and a larger organisation with
+app.profiling.assert_max_queries, so an endpoint whose query count grows
+with the number of employees, runs or payslips fails.
+"""
+import pytest
+from app import db
+from app.models import Payslip
+from app.profiling import assert_max_queries
+
+# Employee counts of the organisations each budget is checked against
+ORG_SIZES = [5, 40]
+
+# A month after the seeded payroll history
+NEW_PERIOD = {'month': 10, 'year': 2026}
+
+pytestmark = pytest.mark.parametrize('app', ORG_SIZES, indirect=True)
+
+@pytest.fixture
+def headers(client, admin_headers):
+    # Resolve and cache the caller's auth context outside the measured blocks
+    client.get('/api/payroll/runs?per_page=1', headers=admin_headers)
+    return admin_headers
+
+@pytest.mark.parametrize('url, limit', [
+    # Page, current salaries and the facet scan (totals + department/type counts)
+    ('/api/employees?per_page=100', 3),
+    ('/api/employees?per_page=100&department=Engineering', 3),
+    ('/api/employees?limit=100', 2),
+    ('/api/payroll/employees', 2),
+    ('/api/payroll/runs?per_page=100', 2),
+    ('/api/payroll/runs?limit=100', 1),
+    ('/api/payslips?per_page=100', 2),
+    ('/api/payslips?limit=100', 1),
+])
+def test_list_endpoints(client, headers, url, limit):
+    with assert_max_queries(limit):
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+
+def test_payslip_detail(app, client, headers):
+    with app.app_context():
+        payslip_id = db.session.query(Payslip.id).order_by(Payslip.id).first()[0]
+    with assert_max_queries(4):
+        response = client.get(f'/api/payslips/{payslip_id}', headers=headers)
+    assert response.status_code == 200
+
+def test_preview(client, headers):
+    with assert_max_queries(4):
+        response = client.get('/api/payroll/preview?month=10&year=2026', headers=headers)
+        # The employee breakdown is streamed, so its queries run while reading the body
+        body = response.get_json()
+    assert response.status_code == 200
+    assert body['employees']
+
+def test_bulk_create_and_process_month(app, client, headers):
+    with assert_max_queries(4):
+        response = client.post('/api/payroll/runs/bulk', json=NEW_PERIOD, headers=headers)
+    assert response.status_code == 201
+    created = response.get_json()['success_count']
+    assert created > 0
+    
+    with assert_max_queries(10):
+        response = client.post('/api/payroll/runs/process', json=NEW_PERIOD, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['processed_count'] == created
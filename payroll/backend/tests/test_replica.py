@@ -0,0 +1,73 @@
+"""Read replica routing (app.replica)
+
+The replica bind is TEST_REPLICA_DATABASE_URL when set, otherwise a SQLite
+file. Either way it must be a separate database that does not replicate from
+the primary: it is left empty, so a read that reaches it finds no rows.
+"""
+import os
+import pytest
+from app import create_app, db
+from app.models import Employee, User
+from app.services.job_service import JobService
+from app.services.seed_service import SeedService, SEED_USERS
+from config import TestingConfig
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    url = os.getenv('TEST_REPLICA_DATABASE_URL') or f"sqlite:///{tmp_path / 'replica.db'}"
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_BINDS', {'replica': url})
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        db.metadata.drop_all(db.engines['replica'])
+        db.metadata.create_all(db.engines['replica'])
+        SeedService.seed(5, months=1, seed=1)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.metadata.drop_all(db.engines['replica'])
+        db.drop_all()
+
+def test_reads_go_to_the_replica(client, admin_headers):
+    response = client.get('/api/payroll/runs', headers=admin_headers)
+    
+    # The caller's auth context still came from the primary
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 0
+
+def test_auth_context_is_loaded_from_the_primary(app, client, admin_headers):
+    # The user only exists on the primary; a role-checked list would be refused
+    # if the auth context were read from the replica
+    app.config['AUTH_CONTEXT_TTL'] = 0
+    for _ in range(2):
+        response = client.get('/api/employees', headers=admin_headers)
+        assert response.status_code == 200
+        assert response.get_json()['pagination']['total'] == 0
+
+def test_writer_is_pinned_to_the_primary(app, client, admin_headers, finance_headers):
+    with app.app_context():
+        employee_id = db.session.query(Employee.id).first()[0]
+    response = client.put(f'/api/employees/{employee_id}', json={'phone': '+1 555 010 0100'},
+                          headers=admin_headers)
+    assert response.status_code == 200
+    
+    assert client.get('/api/payroll/runs', headers=admin_headers).get_json()['total'] > 0
+    # Other users keep reading from the replica
+    assert client.get('/api/payroll/runs', headers=finance_headers).get_json()['total'] == 0
+
+def test_replica_requires_a_shared_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_BINDS', {'replica': f"sqlite:///{tmp_path / 'replica.db'}"})
+    monkeypatch.setattr(TestingConfig, 'TESTING', False)
+    with pytest.raises(RuntimeError, match='CACHE_BACKEND=redis'):
+        create_app('testing')
+
+def test_job_status_is_read_from_the_primary(app, client, admin_headers):
+    # Queued outside any request, as the worker's own writes are, so no pin applies
+    with app.app_context():
+        admin_id = User.query.filter_by(email=SEED_USERS[0][0]).one().id
+        job_id = JobService.submit('payslips.render_pdfs', {'month': 9, 'year': 2026}, admin_id).id
+    
+    response = client.get(f'/api/jobs/{job_id}', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()['job']['status'] == 'queued'
+    assert client.get('/api/jobs', headers=admin_headers).get_json()['total'] == 1
@@ -0,0 +1,13 @@
+"""WSGI entry point for production servers: gunicorn wsgi:app (see gunicorn.conf.py)"""
+import os
+from app import create_app
+from app.cache import warn_if_process_local
+from app.schema import check_schema
+from app.warmup import warm_up
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))
+
+warn_if_process_local(app)
+with app.app_context():
+    check_schema()
+warm_up(app)
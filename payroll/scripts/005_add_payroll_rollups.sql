@@ -0,0 +1,16 @@
+-- Migration: materialized monthly payroll rollup for analytics
+-- Populate or repair it afterwards with: flask analytics rebuild-rollup
+
+CREATE TABLE IF NOT EXISTS payroll_rollups (
+  id INT PRIMARY KEY AUTO_INCREMENT,
+  year INT NOT NULL,
+  month INT NOT NULL,
+  department VARCHAR(100) NOT NULL DEFAULT '',
+  payslip_count INT NOT NULL DEFAULT 0,
+  total_gross DECIMAL(15, 2) NOT NULL DEFAULT 0,
+  total_tax DECIMAL(15, 2) NOT NULL DEFAULT 0,
+  total_deductions DECIMAL(15, 2) NOT NULL DEFAULT 0,
+  total_net DECIMAL(15, 2) NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  UNIQUE KEY uk_payroll_rollups_period_department (year, month, department)
+);
@@ -0,0 +1,7 @@
+-- Migration: indexes backing cursor (keyset) pagination
+-- Each index matches the sort key the list endpoint seeks on
+
+CREATE INDEX idx_payslips_created_at_id ON payslips(created_at, id);
+CREATE INDEX idx_payroll_runs_year_month_id ON payroll_runs(year, month, id);
+CREATE INDEX idx_employees_active_name_id ON employees(is_active, name, id);
+CREATE INDEX idx_employees_active_created_at_id ON employees(is_active, created_at, id);
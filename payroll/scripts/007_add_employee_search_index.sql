@@ -0,0 +1,4 @@
+-- Migration: FULLTEXT index for employee search
+-- Replaces the leading-wildcard ILIKE scan in GET /api/employees?search=
+
+ALTER TABLE employees ADD FULLTEXT INDEX ft_employees_search (name, email, employee_id, position);
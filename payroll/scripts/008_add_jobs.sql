@@ -0,0 +1,22 @@
+-- Migration: background jobs table
+-- Queued jobs are picked up by: flask jobs worker
+
+CREATE TABLE IF NOT EXISTS jobs (
+  id INT PRIMARY KEY AUTO_INCREMENT,
+  job_type VARCHAR(50) NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'queued',
+  params JSON NOT NULL,
+  result JSON,
+  error TEXT,
+  progress_current INT NOT NULL DEFAULT 0,
+  progress_total INT,
+  attempts INT NOT NULL DEFAULT 0,
+  worker VARCHAR(100),
+  created_by INT,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  started_at TIMESTAMP NULL,
+  heartbeat_at TIMESTAMP NULL,
+  finished_at TIMESTAMP NULL,
+  FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL,
+  INDEX idx_jobs_status_id (status, id)
+);
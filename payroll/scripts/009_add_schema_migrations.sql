@@ -0,0 +1,12 @@
+-- Migration: record applied schema versions
+-- The app compares the highest version here with app.schema.SCHEMA_VERSION on
+-- startup instead of running create_all. Every later script must end with
+-- INSERT IGNORE INTO schema_migrations (version) VALUES (<its number>);
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  version INT PRIMARY KEY,
+  applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Scripts 001-008 predate the table; mark them applied along with this one
+INSERT IGNORE INTO schema_migrations (version) VALUES (1), (2), (3), (4), (5), (6), (7), (8), (9);
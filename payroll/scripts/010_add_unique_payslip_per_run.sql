@@ -0,0 +1,11 @@
+-- Migration: at most one payslip per payroll run
+-- Backstop for concurrent month processing; list any existing duplicates
+-- (and delete all but one of each) before applying:
+--   SELECT payroll_run_id, COUNT(*) FROM payslips GROUP BY payroll_run_id HAVING COUNT(*) > 1;
+
+ALTER TABLE payslips ADD UNIQUE KEY uk_payslips_payroll_run_id (payroll_run_id);
+
+-- Covered by the unique key
+DROP INDEX idx_payslips_payroll_run_id ON payslips;
+
+INSERT IGNORE INTO schema_migrations (version) VALUES (10);